@@ -0,0 +1,56 @@
+"""Time copying the assets to the dist directory, with copytree as the
+builds did before, and with the asset sync on a first and a later build.
+
+    python benchmarks/assets.py [n_files] [kb_per_file]
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+from os.path import join
+from syrinx.assets import source_dirs, sync_assets
+
+
+def make_assets(root_dir: str, n_files: int, n_kb: int):
+    content = os.urandom(n_kb * 1024)
+    for source_dir in source_dirs(root_dir):
+        for n in range(n_files // 2):
+            fpath = join(source_dir, f'dir{n % 20}', f'image{n}.png')
+            os.makedirs(os.path.dirname(fpath), exist_ok=True)
+            with open(fpath, 'wb') as fhandle:
+                fhandle.write(content)
+
+
+def copytree(root_dir: str, target_dir: str):
+    if os.path.isdir(target_dir):
+        shutil.rmtree(target_dir)
+    project_dir, theme_dir = source_dirs(root_dir)
+    shutil.copytree(theme_dir, target_dir)
+    shutil.copytree(project_dir, target_dir, dirs_exist_ok=True)
+
+
+def timed(func, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main():
+    n_files = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    n_kb = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    with tempfile.TemporaryDirectory() as root_dir:
+        make_assets(root_dir, n_files, n_kb)
+        target_dir = join(root_dir, 'dist', 'assets')
+        print(f'files:       {n_files} of {n_kb} kB')
+        print(f'copytree:    {timed(copytree, root_dir, target_dir):.2f} s')
+        shutil.rmtree(target_dir)
+        sources = source_dirs(root_dir)
+        print(f'sync, first: {timed(sync_assets, sources, target_dir):.2f} s')
+        print(f'sync, later: {timed(sync_assets, sources, target_dir):.2f} s')
+        shutil.rmtree(target_dir)
+        print(f'link, first: {timed(sync_assets, sources, target_dir, link=True):.2f} s')
+
+
+if __name__ == '__main__':
+    main()
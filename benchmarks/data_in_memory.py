@@ -0,0 +1,50 @@
+"""Time preprocessing and reading a data collection, through content
+files on disk and with the records kept in memory.
+
+Uses the project generated by the preprocess benchmark.
+
+    python benchmarks/data_in_memory.py [n_rows]
+"""
+import sys
+import time
+import tempfile
+from os import makedirs
+from os.path import join
+from unittest.mock import Mock
+from syrinx.preprocess import preprocess
+from syrinx.read import read
+from preprocess import make_project
+
+
+def run(n_rows: int, in_memory: bool) -> float:
+    config = Mock()
+    config.jobs = 1
+    config.clean = True
+    config.data_in_memory = in_memory
+    config.data_write_files = False
+    config.leaf_pages = True
+    with tempfile.TemporaryDirectory() as root_dir:
+        make_project(root_dir, n_rows)
+        makedirs(join(root_dir, 'content'), exist_ok=True)
+        with open(join(root_dir, 'content', 'index.md'), 'w') as fhandle:
+            fhandle.write('+++\n+++\n')
+        start = time.perf_counter()
+        records = preprocess(root_dir, config)
+        root = read(root_dir, config, records=records)
+        ## convert all markdown, as building would
+        for leaf in root.branches[0].leaves:
+            leaf.content_html
+        return time.perf_counter() - start
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    on_disk = run(n_rows, in_memory=False)
+    in_memory = run(n_rows, in_memory=True)
+    print(f'rows:      {n_rows}')
+    print(f'on disk:   {on_disk:.2f} s')
+    print(f'in memory: {in_memory:.2f} s')
+
+
+if __name__ == '__main__':
+    main()
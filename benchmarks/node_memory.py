@@ -0,0 +1,44 @@
+"""Measure the memory used per ContentNode in a large content tree.
+
+Builds a tree shaped like a preprocessed data collection: a number of
+branches with many leaves each, with short frontmatter and markdown.
+
+    python benchmarks/node_memory.py [n_leaves]
+"""
+import sys
+import tracemalloc
+from unittest.mock import Mock
+from syrinx.node import makeBranchNode, makeLeafNode
+
+
+def make_tree(n_leaves: int, n_branches: int = 20):
+    config = Mock()
+    root = makeBranchNode(config, '')
+    root.setContent('/index.md', {'Title': 'Home'}, '')
+    for b in range(n_branches):
+        branch = makeBranchNode(config, f'collection{b}')
+        branch.setContent(f'/collection{b}/index.md', {'Title': f'C{b}'}, '')
+        root.branches.append(branch)
+        for r in range(n_leaves // n_branches):
+            leaf = makeLeafNode(config)
+            leaf.setContent(f'/collection{b}/record{r}.md', {'SequenceNumber': r}, '')
+            branch.leaves.append(leaf)
+    return root
+
+
+def main():
+    n_leaves = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    root = make_tree(n_leaves)
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    n_nodes = 1 + len(root.branches) + sum(len(b.leaves) for b in root.branches)
+    print(f'nodes:          {n_nodes}')
+    print(f'total:          {(after - before) / 2**20:.1f} MiB')
+    print(f'peak:           {(peak - before) / 2**20:.1f} MiB')
+    print(f'bytes per node: {(after - before) / n_nodes:.0f}')
+
+
+if __name__ == '__main__':
+    main()
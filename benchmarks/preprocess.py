@@ -0,0 +1,56 @@
+"""Time preprocessing a 100k-row TSV into content files.
+
+Generates a temporary project with one archetype and one data file
+with a mix of text, integer, float and missing values.
+
+    python benchmarks/preprocess.py [n_rows]
+"""
+import sys
+import time
+import tempfile
+from os import makedirs
+from os.path import join
+from unittest.mock import Mock
+from syrinx.preprocess import preprocess
+
+ARCHETYPE = """+++
+Title = "{{ Name }}"
+SequenceNumber = {{ SequenceNumber }}
+Price = {{ Price }}
+Stock = {{ Stock }}
++++
+
+{{ Name }} is a {{ Category }}. {{ Description }}
+"""
+
+
+def make_project(root_dir: str, n_rows: int):
+    makedirs(join(root_dir, 'archetypes'))
+    makedirs(join(root_dir, 'data'))
+    with open(join(root_dir, 'archetypes', 'products.md'), 'w') as fhandle:
+        fhandle.write(ARCHETYPE)
+    with open(join(root_dir, 'data', 'products.tsv'), 'w') as fhandle:
+        fhandle.write('ProductId\tName\tCategory\tPrice\tStock\tDescription\n')
+        for r in range(n_rows):
+            description = '' if r % 7 == 0 else f'Product number {r} of the catalogue.'
+            fhandle.write(f'p{r:07d}\tProduct {r}\tcategory{r % 13}\t{r * 0.25:.2f}'
+                          f'\t{r % 101}\t{description}\n')
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    config = Mock()
+    config.clean = True
+    config.data_in_memory = False
+    with tempfile.TemporaryDirectory() as root_dir:
+        make_project(root_dir, n_rows)
+        start = time.perf_counter()
+        preprocess(root_dir, config)
+        duration = time.perf_counter() - start
+    print(f'rows:     {n_rows}')
+    print(f'duration: {duration:.2f} s')
+    print(f'rows/s:   {n_rows / duration:.0f}')
+
+
+if __name__ == '__main__':
+    main()
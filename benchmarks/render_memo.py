@@ -0,0 +1,73 @@
+"""Time rendering a site whose pages all loop over the navigation,
+with and without memoized node properties.
+
+Every page lists all top-level branches with their address and last
+modified date, and its own children with their address, which is
+the pattern that made property lookups O(pages x nodes).
+
+    python benchmarks/render_memo.py [n_pages]
+"""
+import sys
+import time
+from unittest.mock import Mock
+from jinja2 import Environment
+from syrinx.branches import Branches
+from syrinx.node import ContentNode, MEMOIZED, makeBranchNode, makeLeafNode
+from syrinx.build import iter_nodes
+
+TEMPLATE = """
+<nav>{% for b in root.branches %}<a href="{{ b.address }}">{{ b.title }}</a>
+{{ b.lastModified }}{% for l in b.leaves %}{% if l.includeInSitemap %}.{% endif %}{% endfor %}{% endfor %}</nav>
+<ul>{% for l in index.leaves %}<li><a href="{{ l.address }}">{{ l.title }}</a></li>{% endfor %}</ul>
+"""
+
+
+def make_tree(n_pages: int, n_branches: int = 25):
+    config = Mock()
+    config.domain = 'example.com'
+    config.urlformat = 'filesystem'
+    config.sitemap = 'opt-out'
+    config.leaf_pages = True
+    config.branches = Branches({})
+    root = makeBranchNode(config, '')
+    root.setContent('/index.md', {}, '')
+    for b in range(n_branches):
+        branch = makeBranchNode(config, f'section{b}')
+        branch.setContent(f'/section{b}/index.md', {'LastModified': '2025-10-01T12:00:00'}, '')
+        root.branches.append(branch)
+        for p in range(n_pages // n_branches):
+            leaf = makeLeafNode(config)
+            leaf.setContent(f'/section{b}/page{p}.md', {}, '')
+            branch.leaves.append(leaf)
+    return root
+
+
+def render_all(root, template) -> float:
+    start = time.perf_counter()
+    for node in iter_nodes(root):
+        if node.buildPage:
+            template.render(index=node, root=root)
+    return time.perf_counter() - start
+
+
+def main():
+    n_pages = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    template = Environment().from_string(TEMPLATE)
+
+    memoized = dict((slot, getattr(ContentNode, slot[1:])) for slot in MEMOIZED)
+    for slot, prop in memoized.items():
+        ## plain property computing the value on every access, as before
+        setattr(ContentNode, slot[1:], property(prop.fget.__wrapped__))
+    before = render_all(make_tree(n_pages), template)
+
+    for slot, prop in memoized.items():
+        setattr(ContentNode, slot[1:], prop)
+    after = render_all(make_tree(n_pages), template)
+
+    print(f'pages:        {n_pages}')
+    print(f'not memoized: {before:.2f} s')
+    print(f'memoized:     {after:.2f} s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""Count the stat calls made to find and load the template of each
+node, with a lookup per node and with the template index.
+
+The per-node lookup checks for candidate template files and asks the
+Environment for the template, which checks whether it changed on disk.
+
+    python benchmarks/template_lookup.py [n_nodes]
+"""
+import os
+import sys
+import time
+import tempfile
+from os.path import join, isfile
+from unittest.mock import Mock, patch
+from syrinx.build import TemplateIndex, choose_template_file, make_environment
+
+
+def make_nodes(n_nodes: int):
+    nodes = []
+    for n in range(n_nodes):
+        node = Mock()
+        node.name = f'page{n}'
+        node.isLeaf = n % 10 != 0
+        nodes.append(node)
+    return nodes
+
+
+def per_node(nodes, template_dir: str):
+    env = make_environment(template_dir)
+    for node in nodes:
+        env.get_template(choose_template_file(node, isfile, template_dir))
+
+
+def indexed(nodes, template_dir: str):
+    templates = TemplateIndex(template_dir, make_environment(template_dir))
+    for node in nodes:
+        templates.get(node)
+
+
+def measure(lookup, nodes, template_dir: str):
+    with patch('os.stat', wraps=os.stat) as stat:
+        start = time.perf_counter()
+        lookup(nodes, template_dir)
+        duration = time.perf_counter() - start
+    return stat.call_count, duration
+
+
+def main():
+    n_nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    nodes = make_nodes(n_nodes)
+    with tempfile.TemporaryDirectory() as template_dir:
+        for fname in ['page.jinja2', 'leaf.jinja2', 'root.jinja2']:
+            with open(join(template_dir, fname), 'w') as fhandle:
+                fhandle.write('{{ index.name }}')
+        print(f'nodes:    {n_nodes}')
+        for label, lookup in [('per node', per_node), ('indexed', indexed)]:
+            n_stat, duration = measure(lookup, nodes, template_dir)
+            print(f'{label}: {n_stat:>8} stat calls {duration:.2f} s')
+
+
+if __name__ == '__main__':
+    main()
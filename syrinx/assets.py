@@ -0,0 +1,148 @@
+"""Keep the assets in the dist directory in sync with their sources
+
+Assets come from the `assets` directory of the theme and of the project,
+where project assets take precedence over theme assets of the same name.
+A file is only copied if its size or modification time differs from the
+copy in the dist directory, and files that are in neither source directory
+anymore are removed. Copies keep the modification time of their source,
+so unchanged assets are recognized in the next build.
+
+Files can be hard linked instead of copied, which is instant and takes no
+space, but means the dist directory shares the files with the sources.
+"""
+from __future__ import annotations
+from typing import Dict, List, Optional, Sequence, Tuple
+from os.path import join, isdir, dirname
+from concurrent.futures import ThreadPoolExecutor
+import os, shutil, logging
+logger = logging.getLogger(__name__)
+
+
+def source_dirs(root_dir: str) -> List[str]:
+    """Directories that assets are taken from, by precedence
+    """
+    return [join(root_dir, 'assets'), join(root_dir, 'theme', 'assets')]
+
+
+def list_files(top_dir: str) -> Dict[str, os.stat_result]:
+    """Files in a directory tree, by relative path, with their stats
+    """
+    files: Dict[str, os.stat_result] = dict()
+    if not isdir(top_dir):
+        return files
+    todo = ['']
+    while todo:
+        rel_dir = todo.pop()
+        with os.scandir(join(top_dir, rel_dir)) as entries:
+            for entry in entries:
+                rel_path = join(rel_dir, entry.name)
+                if entry.is_dir():
+                    todo.append(rel_path)
+                elif entry.is_file():
+                    files[rel_path] = entry.stat()
+    return files
+
+
+def is_current(source: os.stat_result, target: os.stat_result) -> bool:
+    """Whether the target is a copy or a link of the source
+    """
+    if (source.st_dev, source.st_ino) == (target.st_dev, target.st_ino):
+        return True
+    return (source.st_size == target.st_size
+            and source.st_mtime_ns == target.st_mtime_ns)
+
+
+def copy_asset(source: str, target: str, link: bool = False) -> None:
+    """Copy or hard link a single file, replacing the target
+
+    The target is removed first, so that writing it never changes a file
+    it was linked to. Links fall back to copies across file systems.
+    """
+    os.makedirs(dirname(target), exist_ok=True)
+    if os.path.lexists(target):
+        os.remove(target)
+    if link:
+        try:
+            os.link(source, target)
+            return
+        except OSError:
+            pass
+    shutil.copy2(source, target)
+
+
+def sync_asset(rel_path: str, sources: Sequence[str], target_dir: str, link: bool = False) -> None:
+    """Bring a single asset in the target directory up to date
+
+    Args:
+        rel_path: Path of the asset relative to the assets directories
+        sources: Source directories, by precedence
+        target_dir: Assets directory in dist
+        link: Whether to hard link rather than copy
+    """
+    target = join(target_dir, rel_path)
+    for source_dir in sources:
+        source = join(source_dir, rel_path)
+        if os.path.isfile(source):
+            copy_asset(source, target, link)
+            return
+    if os.path.lexists(target):
+        os.remove(target)
+
+
+def sync_assets(
+        sources: Sequence[str],
+        target_dir: str,
+        link: bool = False,
+        threads: Optional[int] = None
+    ) -> Tuple[List[str], List[str]]:
+    """Copy changed assets to the target directory and remove deleted ones
+
+    Args:
+        sources: Source directories, by precedence
+        target_dir: Assets directory in dist
+        link: Whether to hard link rather than copy
+        threads: Number of threads to copy files with, by default
+            as many as the ThreadPoolExecutor default
+
+    Returns:
+        Tuple of the paths of the assets copied and of those removed,
+        relative to the target directory
+    """
+    wanted: Dict[str, Tuple[str, os.stat_result]] = dict()
+    for source_dir in reversed(sources):
+        for rel_path, stat in list_files(source_dir).items():
+            wanted[rel_path] = (join(source_dir, rel_path), stat)
+    existing = list_files(target_dir)
+
+    outdated = [rel_path for (rel_path, (_, stat)) in wanted.items()
+                if rel_path not in existing or not is_current(stat, existing[rel_path])]
+    removed = [rel_path for rel_path in existing if rel_path not in wanted]
+
+    for rel_path in removed:
+        os.remove(join(target_dir, rel_path))
+        logger.info(f'Removed assets/{rel_path}')
+    remove_empty_dirs(target_dir)
+
+    def copy(rel_path: str) -> None:
+        copy_asset(wanted[rel_path][0], join(target_dir, rel_path), link)
+
+    if len(outdated) > 1:
+        with ThreadPoolExecutor(threads) as executor:
+            for _ in executor.map(copy, outdated):
+                pass
+    else:
+        for rel_path in outdated:
+            copy(rel_path)
+    if outdated:
+        logger.info(f'Copied {len(outdated)} assets, {len(wanted) - len(outdated)} unchanged')
+    return sorted(outdated), sorted(removed)
+
+
+def remove_empty_dirs(top_dir: str) -> None:
+    """Remove directories without files below the top directory
+    """
+    if not isdir(top_dir):
+        return
+    for dirpath, _, _ in os.walk(top_dir, topdown=False):
+        if dirpath != top_dir and not os.listdir(dirpath):
+            os.rmdir(dirpath)
@@ -1,11 +1,18 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING, Callable
-from os.path import isdir, join, isfile
+from typing import TYPE_CHECKING, Callable, Optional, List, Tuple, Dict, Iterator, Set
+from os.path import isdir, join, relpath
+from concurrent.futures import ProcessPoolExecutor
 import shutil, os, logging
 from jinja2 import Environment, FileSystemLoader, select_autoescape
+from syrinx.assets import source_dirs, sync_assets
+from syrinx.cache import open_bytecode_cache
 from syrinx.exceptions import ThemeError
-from syrinx.sitemap import collect_urls, generate_sitemap
+from syrinx.sitemap import iter_urls, write_sitemap
+from syrinx.manifest import (load_manifest, remove_manifest, settings_digest,
+    tree_keys, TemplateDependencies, TrackedNode)
 if TYPE_CHECKING:
+    from jinja2 import BytecodeCache, Template
+    from syrinx.manifest import Manifest
     from syrinx.read import ContentNode
     from syrinx.config import SyrinxConfiguration
 logger = logging.getLogger(__name__)
@@ -24,72 +31,246 @@ def choose_template_file(
         raise ThemeError(f'Missing template for "{node.name}"')
 
 
-def dir_exists_not_empty(path: str) -> bool:
-    if isdir(path):
-        if len(os.listdir(path)):
-            return True
-    return False
+class TemplateIndex:
+    """Page templates of the theme, resolved once per build
+
+    The template directory is listed once, and the template chosen for each
+    combination of node name and type is remembered, so that nodes resolve
+    their template with dict lookups rather than file system calls.
+    """
+
+    def __init__(self, template_dir: str, env: Environment) -> None:
+        self.template_dir = template_dir
+        self.env = env
+        self.fpaths: Set[str] = set()
+        if isdir(template_dir):
+            with os.scandir(template_dir) as entries:
+                self.fpaths = set(e.path for e in entries if e.is_file())
+        self.chosen: Dict[Tuple[str, bool], str] = dict()
+        self.templates: Dict[str, Template] = dict()
+
+    def choose(self, node: ContentNode) -> str:
+        """File name of the template for this node
+        """
+        key = (node.name, node.isLeaf)
+        if key not in self.chosen:
+            self.chosen[key] = choose_template_file(
+                node, self.fpaths.__contains__, self.template_dir)
+        return self.chosen[key]
+
+    def get(self, node: ContentNode) -> Template:
+        """The loaded template for this node
+        """
+        fname = self.choose(node)
+        if fname not in self.templates:
+            self.templates[fname] = self.env.get_template(fname)
+        return self.templates[fname]
+
+
+def clear_dist(dist_dir: str):
+    """Remove everything in the dist directory except the assets
+
+    Assets are synced separately, which removes those that were deleted.
+    """
+    if not isdir(dist_dir):
+        return
+    with os.scandir(dist_dir) as entries:
+        for entry in entries:
+            if entry.name == 'assets' and entry.is_dir(follow_symlinks=False):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                shutil.rmtree(entry.path)
+            else:
+                os.remove(entry.path)
+
+
+def make_environment(
+        template_dir: str,
+        bytecode_cache: Optional[BytecodeCache] = None
+    ) -> Environment:
+    return Environment(
+        loader=FileSystemLoader(template_dir),
+        autoescape=select_autoescape(),
+        bytecode_cache=bytecode_cache
+    )
+
+
+def render_page(
+        node: ContentNode,
+        root: ContentNode,
+        out_fpath: str,
+        templates: TemplateIndex,
+        reads: Optional[Set[int]] = None
+    ):
+    """Render the page for a single node and write it to disk
+
+    If a *reads* set is passed, the ids of the nodes that the template
+    reads are added to it.
+    """
+    if reads is None:
+        html = templates.get(node).render(index=node, root=root)
+    else:
+        html = templates.get(node).render(
+            index=TrackedNode(node, reads), root=TrackedNode(root, reads))
+    with open(out_fpath, 'w') as fhandle:
+        fhandle.write(html)
+    rel_path = out_fpath.replace(out_fpath.split('dist/')[0], '')
+    logger.info(f'Built {rel_path}')
 
 
 def build_node(
         node: ContentNode,
         root: ContentNode,
         parent_path: str,
-        template_dir: str,
-        env: Environment
+        templates: TemplateIndex,
+        manifest: Optional[Manifest] = None,
+        pending: Optional[List[Tuple[ContentNode, str]]] = None
     ):
     """Recursive function to render page, then move on to children
+
+    If a manifest is passed, pages that are unchanged since the previous
+    build are skipped. If a *pending* list is passed, pages are not rendered
+    but added to the list as tuples of node and output file path.
     """
     node_path = join(parent_path, node.name)
     os.makedirs(node_path, exist_ok=True)
     if node.buildPage:
-        fname_tem = choose_template_file(node, isfile, template_dir)
-        page_template = env.get_template(fname_tem)
-        html = page_template.render(index=node, root=root)
         out_fpath = join(node_path, f'{node.name}.html' if node.isLeaf else 'index.html')
-        with open(out_fpath, 'w') as fhandle:
-            fhandle.write(html)
-        rel_path = out_fpath.replace(out_fpath.split('dist/')[0], '')
-        logger.info(f'Built {rel_path}')
+        if manifest is None or manifest.is_outdated(node, out_fpath, templates.choose(node)):
+            if pending is None:
+                render_page(node, root, out_fpath, templates)
+            else:
+                pending.append((node, out_fpath))
 
     for child in node.branches+node.leaves:
-        build_node(child, root, node_path, template_dir, env)
+        build_node(child, root, node_path, templates, manifest, pending)
 
 
-def build(root: ContentNode, root_dir: str, config: SyrinxConfiguration):
+def iter_nodes(node: ContentNode) -> Iterator[ContentNode]:
+    yield node
+    for child in node.branches+node.leaves:
+        yield from iter_nodes(child)
+
+
+## State of a render worker process, set up by init_render_worker
+_worker: Dict = dict()
+
+
+def init_render_worker(
+        root: ContentNode,
+        template_dir: str,
+        bytecode_cache: Optional[BytecodeCache]
+    ):
+    """Give the worker process its own copy of the tree and its own Environment
+    """
+    _worker['root'] = root
+    env = make_environment(template_dir, bytecode_cache)
+    _worker['templates'] = TemplateIndex(template_dir, env)
+    _worker['nodes'] = dict((n.source_path, n) for n in iter_nodes(root) if n.source_path)
+    _worker['keys'] = tree_keys(root)
+
+
+def render_in_worker(source_path: str, out_fpath: str, track: bool) -> Optional[List[str]]:
+    """Render a page, returning the keys of the nodes read if tracked
+    """
+    node = _worker['nodes'][source_path]
+    reads: Optional[Set[int]] = set() if track else None
+    render_page(node, _worker['root'], out_fpath, _worker['templates'], reads)
+    if reads is None:
+        return None
+    return [_worker['keys'][r] for r in reads]
+
+
+def render_parallel(
+        pending: List[Tuple[ContentNode, str]],
+        root: ContentNode,
+        template_dir: str,
+        jobs: int,
+        bytecode_cache: Optional[BytecodeCache] = None,
+        track: bool = False
+    ) -> List[Optional[List[str]]]:
+    """Render pages across a pool of worker processes
+
+    Workers identify nodes by their source path, so only those and the
+    output paths are sent per page.
+
+    Returns:
+        For each page, the keys of the nodes read if tracked, else None
+    """
+    source_paths = [node.source_path for (node, _) in pending]
+    out_fpaths = [out_fpath for (_, out_fpath) in pending]
+    chunksize = max(1, len(pending) // (jobs * 4))
+    with ProcessPoolExecutor(jobs, initializer=init_render_worker,
+                             initargs=(root, template_dir, bytecode_cache)) as executor:
+        return list(executor.map(render_in_worker, source_paths, out_fpaths,
+                                 [track] * len(pending), chunksize=chunksize))
+
+
+def build(
+        root: ContentNode,
+        root_dir: str,
+        config: SyrinxConfiguration,
+        env: Optional[Environment] = None,
+        manifest: Optional[Manifest] = None
+    ) -> List[str]:
+    """Render the pages of the tree and copy the assets to the dist directory
+
+    An Environment can be passed to reuse the templates it loaded before.
+    In incremental mode the manifest of the previous build is loaded,
+    unless one is passed, such as a manifest kept in memory between builds.
+    Full builds remove the manifest, as it no longer describes the pages.
+
+    Returns:
+        List[str]: Paths of the pages rendered, relative to the dist directory
+    """
 
     assert isdir(root_dir)
             
     theme_dir = join(root_dir, 'theme')
     template_dir = join(theme_dir, 'templates')
-    env = Environment(
-        loader=FileSystemLoader(template_dir),
-        autoescape=select_autoescape()
-    )
+    bytecode_cache = open_bytecode_cache(root_dir) if config.cache else None
+    if env is None:
+        env = make_environment(template_dir, bytecode_cache)
+    templates = TemplateIndex(template_dir, env)
 
-    ## locate and clear target directory
     dist_dir = join(root_dir, 'dist')
-    if isdir(dist_dir):
-        shutil.rmtree(dist_dir)
+
+    ## in incremental mode, compare against the previous build
+    if manifest is None and config.incremental:
+        manifest = load_manifest(root_dir)
+    if manifest is None:
+        remove_manifest(root_dir)
+    else:
+        manifest.begin(root, settings_digest(config), dist_dir, TemplateDependencies(env))
+
+    ## locate and clear target directory
+    if manifest is None or manifest.is_empty():
+        clear_dist(dist_dir)
     os.makedirs(dist_dir, exist_ok=True)
 
-    build_node(root, root, dist_dir, template_dir, env)
+    pending: List[Tuple[ContentNode, str]] = []
+    build_node(root, root, dist_dir, templates, manifest, pending)
+    track = manifest is not None
+    if config.jobs > 1 and len(pending) > 1:
+        reads = render_parallel(pending, root, template_dir, config.jobs, bytecode_cache, track)
+    else:
+        reads = []
+        for node, out_fpath in pending:
+            node_reads: Optional[Set[int]] = set() if track else None
+            render_page(node, root, out_fpath, templates, node_reads)
+            reads.append(None if node_reads is None else [manifest.keys[r] for r in node_reads])
 
-    dist_assets_dir = join(dist_dir, 'assets')
+    if manifest is not None:
+        for (node, _), keys in zip(pending, reads):
+            manifest.record_reads(node, keys)
+        manifest.remove_stale()
+        manifest.save()
 
-    ## copy theme assets tree to dist 
-    theme_assets_dir = join(theme_dir, 'assets')
-    if dir_exists_not_empty(theme_assets_dir):
-        shutil.copytree(theme_assets_dir, dist_assets_dir)
+    ## copy theme and project assets that changed to dist
+    sync_assets(source_dirs(root_dir), join(dist_dir, 'assets'), config.link_assets)
 
-    ## copy assets tree to dist 
-    content_assets_dir = join(root_dir, 'assets')
-    if dir_exists_not_empty(content_assets_dir):
-        shutil.copytree(content_assets_dir, dist_assets_dir, dirs_exist_ok=True)
+    base_url = f'https://{config.domain}'
+    for fname in write_sitemap(iter_urls(root), dist_dir, base_url, config.sitemap_gzip):
+        logger.info(f'Created {fname}')
 
-    sitemap_fpath = join(dist_dir, 'sitemap.xml')
-    urls = collect_urls(root)
-    if urls:
-        with open(sitemap_fpath, 'w') as fhandle:
-            fhandle.write(generate_sitemap(urls))
-        logger.info(f'Created sitemap.xml')
+    return [relpath(out_fpath, dist_dir) for (_, out_fpath) in pending]
@@ -0,0 +1,134 @@
+"""Persistent caches of parsed content files and compiled templates
+
+Parsed content is stored as a SQLite database in the project's
+`.syrinx-cache` directory.
+Entries map the hash of a file's contents to its parsed frontmatter,
+markdown and html.
+The markdown extensions and the syrinx version are part of the key,
+so upgrading either starts with fresh entries. When the database grows
+beyond its maximum size, the least recently used entries are removed.
+"""
+from __future__ import annotations
+from typing import Dict, Optional, Tuple, List
+from os.path import join
+from os import makedirs
+from importlib.metadata import version
+from hashlib import blake2b
+import pickle, sqlite3, time, logging
+from jinja2 import FileSystemBytecodeCache
+from syrinx.manifest import CACHE_DIRNAME
+from syrinx.node import MARKDOWN_EXTENSIONS
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_SIZE = 512 * 2**20
+
+
+def open_parse_cache(root_dir: str, max_bytes: int = DEFAULT_CACHE_SIZE) -> ParseCache:
+    cache_dir = join(root_dir, CACHE_DIRNAME)
+    makedirs(cache_dir, exist_ok=True)
+    salt = f'{version("syrinx")}|{",".join(MARKDOWN_EXTENSIONS)}'
+    return ParseCache(join(cache_dir, 'parse.sqlite'), salt, max_bytes)
+
+
+def open_bytecode_cache(root_dir: str) -> FileSystemBytecodeCache:
+    """Compiled templates and archetypes, kept between builds
+
+    Jinja checks each entry against the source of the template. The
+    directory is specific to the syrinx and jinja versions, so upgrading
+    either starts with fresh entries.
+    """
+    cache_dir = join(root_dir, CACHE_DIRNAME,
+                     f'jinja-{version("syrinx")}-{version("jinja2")}')
+    makedirs(cache_dir, exist_ok=True)
+    return FileSystemBytecodeCache(cache_dir)
+
+
+class ParseCache:
+    """Parsed frontmatter, markdown and html by content hash
+
+    Can be used as a context manager, that closes the cache on exit.
+
+    Attributes:
+        salt: Added to every key, to separate entries of different
+            syrinx versions or markdown extensions
+        max_bytes: Size of the stored entries above which old entries are evicted
+        hits: Number of lookups that found an entry
+        misses: Number of lookups that did not
+    """
+
+    def __init__(self, fpath: str, salt: str, max_bytes: int = DEFAULT_CACHE_SIZE) -> None:
+        self.salt = salt.encode()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.used: List[str] = []
+        self.connection = sqlite3.connect(fpath)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            'key TEXT PRIMARY KEY, value BLOB, size INTEGER, used REAL)'
+        )
+
+    def key(self, content: bytes) -> str:
+        """Cache key for the raw contents of a file
+        """
+        hasher = blake2b(self.salt, digest_size=20)
+        hasher.update(content)
+        return hasher.hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[Dict, str, str]]:
+        """Frontmatter, markdown and html for the key, or None if not cached
+        """
+        row = self.connection.execute(
+            'SELECT value FROM entries WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.used.append(key)
+        return pickle.loads(row[0])
+
+    def put(self, key: str, front: Dict, md: str, html: str) -> None:
+        value = pickle.dumps((front, md, html))
+        self.connection.execute(
+            'INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)',
+            (key, value, len(value), time.time()))
+
+    def evict(self) -> int:
+        """Remove the least recently used entries until within the maximum size
+
+        Returns:
+            int: Number of entries removed
+        """
+        total = self.connection.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        rows = self.connection.execute(
+            'SELECT key, size FROM entries ORDER BY used ASC, rowid ASC').fetchall()
+        stale = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        self.connection.executemany('DELETE FROM entries WHERE key = ?', stale)
+        return len(stale)
+
+    def __enter__(self) -> ParseCache:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Record which entries were used, evict old ones and write to disk
+        """
+        now = time.time()
+        self.connection.executemany(
+            'UPDATE entries SET used = ? WHERE key = ?',
+            [(now, key) for key in self.used])
+        n_evicted = self.evict()
+        self.connection.commit()
+        self.connection.close()
+        logger.info(f'Parse cache: {self.hits} hits, {self.misses} misses, '
+                    f'{n_evicted} evicted')
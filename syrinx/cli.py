@@ -21,12 +21,26 @@ def get_args():
     ## Shared arguments
     base_parser = ArgumentParser(add_help=False)
     base_parser.add_argument('-d', '--dir', type=str, default='.', help='Location of root directory to build from')
+    base_parser.add_argument('--cache', default=SUPPRESS, action='store_true',
+                        help='Keep parsed content and compiled templates in .syrinx-cache to speed up later builds')
     base_parser.add_argument('-c', '--clean', default=SUPPRESS, action='store_true',
                         help='Remove existing dynamic content files')
+    base_parser.add_argument('--data-in-memory', default=SUPPRESS, action='store_true',
+                        help='Turn data records into pages directly, without content files')
+    base_parser.add_argument('--data-write-files', default=SUPPRESS, action='store_true',
+                        help='Also write content files for data records kept in memory')
     base_parser.add_argument('-e', '--environment', default=SUPPRESS, 
                         help='Define build environment for customization, e.g. "production"')
+    base_parser.add_argument('-i', '--incremental', default=SUPPRESS, action='store_true',
+                        help='Only rebuild pages that changed since the previous build')
+    base_parser.add_argument('-j', '--jobs', type=int, default=SUPPRESS,
+                        help='Number of worker processes to read and render pages with')
     base_parser.add_argument('--leaf-pages', default=SUPPRESS, action='store_true',
                         help='Build pages for "leaf" (non-index) content nodes')
+    base_parser.add_argument('--link-assets', default=SUPPRESS, action='store_true',
+                        help='Hard link assets into dist instead of copying them')
+    base_parser.add_argument('--sitemap-gzip', default=SUPPRESS, action='store_true',
+                        help='Compress sitemap files with gzip')
     base_parser.add_argument('-v', '--verbose', default=SUPPRESS, action='store_true', 
                         help='Print log messages during build')
 
@@ -44,6 +58,8 @@ def get_args():
     serve_parser.set_defaults(command='serve')
     serve_parser.add_argument('-p', '--port', type=int, default=8000, 
         help='Which port to run the server on')
+    serve_parser.add_argument('-q', '--quiet-window', type=float, default=0.3,
+        help='Seconds without file changes to wait for before rebuilding')
     
     ## This adds the "new" sub-command
     new_parser = sub_parsers.add_parser('new', help='Generate starter site', parents=[base_parser])
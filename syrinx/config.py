@@ -21,11 +21,18 @@ class BuildMetaInfo:
 
 
 class SyrinxConfiguration:
+    cache: bool
     clean: bool
+    data_in_memory: bool
+    data_write_files: bool
     domain: Optional[str]
     environment: str
+    incremental: bool
+    jobs: int
     leaf_pages: bool
+    link_assets: bool
     sitemap: str
+    sitemap_gzip: bool
     urlformat: str
     verbose: bool
     branches: Branches
@@ -33,8 +40,9 @@ class SyrinxConfiguration:
 
     def __str__(self) -> str:
         lines = []
-        KEYS = ('clean', 'domain', 'environment', 'leaf_pages', 
-                'sitemap', 'urlformat', 'verbose')
+        KEYS = ('cache', 'clean', 'data_in_memory', 'data_write_files', 'domain',
+                'environment', 'incremental', 'jobs', 'leaf_pages', 'link_assets',
+                'sitemap', 'sitemap_gzip', 'urlformat', 'verbose')
         for key in KEYS:
             val = getattr(self, key)
             if isinstance(val, str):
@@ -47,11 +55,18 @@ class SyrinxConfiguration:
 
 def configure(args: Namespace) -> SyrinxConfiguration:
     config = SyrinxConfiguration()
+    config.cache = False
     config.clean = True
+    config.data_in_memory = False
+    config.data_write_files = False
     config.domain = None
     config.environment = 'default'
+    config.incremental = False
+    config.jobs = 1
     config.leaf_pages = False
+    config.link_assets = False
     config.sitemap = 'opt-out'
+    config.sitemap_gzip = False
     config.urlformat = 'filesystem'
     config.verbose = False
 
@@ -68,19 +83,33 @@ def configure(args: Namespace) -> SyrinxConfiguration:
                     continue
                 key, val, *_ = [p.strip() for p in line.split('=')]
                 val = val.strip('"')
-                if key == 'clean':
+                if key == 'cache':
+                    config.cache = val.lower() == 'true'
+                elif key == 'clean':
                     config.clean = val.lower() == 'true'
+                elif key == 'data_in_memory':
+                    config.data_in_memory = val.lower() == 'true'
+                elif key == 'data_write_files':
+                    config.data_write_files = val.lower() == 'true'
                 elif key == 'domain':
                     config.domain = val
                 elif key == 'environment':
                     config.environment = val
+                elif key == 'incremental':
+                    config.incremental = val.lower() == 'true'
+                elif key == 'jobs':
+                    config.jobs = int(val)
                 elif key == 'leaf_pages':
                     config.leaf_pages = val.lower() == 'true'
+                elif key == 'link_assets':
+                    config.link_assets = val.lower() == 'true'
                 elif key == 'sitemap':
                     if val not in ('opt-in', 'opt-out'):
                         raise ValueError('Configuration option "sitemap" must'
                                          ' be one of "opt-in", "opt-out".')
                     config.sitemap = val
+                elif key == 'sitemap_gzip':
+                    config.sitemap_gzip = val.lower() == 'true'
                 elif key == 'urlformat':
                     config.urlformat = val
                 elif key == 'verbose':
@@ -88,7 +117,9 @@ def configure(args: Namespace) -> SyrinxConfiguration:
                 else:
                     raise ValueError(f'Unknown configuration entry: {key}')
 
-    for key in ('clean', 'domain', 'verbose', 'environment', 'leaf_pages', 'urlformat'):
+    for key in ('cache', 'clean', 'data_in_memory', 'data_write_files', 'domain', 'verbose',
+                'environment', 'incremental', 'jobs', 'leaf_pages', 'link_assets', 'sitemap_gzip',
+                'urlformat'):
         if hasattr(args, key):
             setattr(config, key, getattr(args, key))
 
@@ -0,0 +1,366 @@
+"""Keep track of what was built, so that unchanged pages can be skipped
+
+The manifest is a json file stored in the project's `.syrinx-cache` directory.
+For every page built it records the source path, a hash of the content,
+a hash of the frontmatter, its last modified date, a hash of each of the
+other nodes it depends on, a hash of the templates it loads, and the output
+path.
+
+A page's dependencies are its own content, the nodes of the tree that its
+template read while rendering it, its template and the templates that one
+extends, includes or imports, and the configuration. Templates get nodes
+wrapped in a `TrackedNode`, which records each node whose attributes are
+read, so the nodes a template reaches through `root` or the children of
+its children are dependencies as well. The hash of a node covers its
+content, frontmatter, last modified date and the names of its children,
+so pages that list children are built again when one is added or removed.
+"""
+from __future__ import annotations
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, Optional, Set, Tuple
+from os.path import join, isfile, dirname, relpath
+from os import makedirs, remove
+from importlib.metadata import version
+from hashlib import blake2b
+import json, logging
+from jinja2 import TemplateNotFound, meta
+from syrinx.exceptions import UnknownBranchError
+if TYPE_CHECKING:
+    from jinja2 import Environment
+    from syrinx.node import ContentNode
+    from syrinx.config import SyrinxConfiguration
+    PageRecord = Dict[str, Any]
+logger = logging.getLogger(__name__)
+
+MANIFEST_FORMAT = 4
+CACHE_DIRNAME = '.syrinx-cache'
+
+
+def digest(*parts: str) -> str:
+    """Short, stable hash of one or more strings
+    """
+    hasher = blake2b(digest_size=16)
+    for part in parts:
+        hasher.update(part.encode())
+        hasher.update(b'\0')
+    return hasher.hexdigest()
+
+
+def hash_front(front: Dict) -> str:
+    return digest(json.dumps(front, sort_keys=True, default=str))
+
+
+def last_modified(node: ContentNode) -> str:
+    """Last modified date of a node, which can come from the branches file
+
+    Nodes referring to an unknown branch only fail once the date is used.
+    """
+    try:
+        return str(node.lastModified)
+    except UnknownBranchError:
+        return ''
+
+
+def hash_node(node: ContentNode) -> str:
+    """Hash of the frontmatter, content and last modified date of a node
+    """
+    return digest(node.source_path, hash_front(node.front), node.content_md,
+                  last_modified(node))
+
+
+def iter_keyed(node: ContentNode, key: str = '/') -> Iterator[Tuple[str, ContentNode]]:
+    """Nodes of the tree with keys that identify them by their place in it
+
+    Branch keys end with a slash, so that a leaf and a branch of the same
+    name have different keys.
+    """
+    yield key, node
+    for branch in node.branches:
+        yield from iter_keyed(branch, f'{key}{branch.name}/')
+    for leaf in node.leaves:
+        yield from iter_keyed(leaf, f'{key}{leaf.name}')
+
+
+def tree_keys(root: ContentNode) -> Dict[int, str]:
+    """Keys of the nodes of the tree, by node id
+    """
+    return dict((id(node), key) for (key, node) in iter_keyed(root))
+
+
+class TrackedNode:
+    """Stand-in for a node in templates, that records which nodes are read
+
+    Attribute access is passed on to the node, and the ids of the nodes
+    read are added to *reads*. Children are wrapped in turn.
+    """
+    __slots__ = ('_node', '_reads')
+
+    def __init__(self, node: ContentNode, reads: Set[int]) -> None:
+        self._node = node
+        self._reads = reads
+
+    def __getattr__(self, name: str) -> Any:
+        self._reads.add(id(self._node))
+        value = getattr(self._node, name)
+        if name in ('branches', 'leaves'):
+            return [TrackedNode(child, self._reads) for child in value]
+        return value
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, TrackedNode):
+            other = other._node
+        return self._node is other
+
+    def __hash__(self) -> int:
+        return id(self._node)
+
+    def __str__(self) -> str:
+        return str(self._node)
+
+
+def settings_digest(config: SyrinxConfiguration) -> str:
+    """Hash of the configuration entries that affect the rendered pages
+    """
+    return digest(
+        version('syrinx'),
+        str(config.domain),
+        config.environment,
+        str(config.leaf_pages),
+        config.sitemap,
+        config.urlformat,
+    )
+
+
+class TemplateDependencies:
+    """Hashes of the templates that each page template loads
+
+    These are the template itself and the templates it extends, includes
+    or imports, directly or indirectly. If a template refers to another
+    by a variable, which can't be told from its source, pages using it
+    depend on all templates.
+    """
+
+    def __init__(self, env: Environment) -> None:
+        self.env = env
+        self.sources: Dict[str, str] = dict()
+        self.references: Dict[str, Optional[Set[str]]] = dict()
+        self.digests: Dict[str, str] = dict()
+
+    def source_digest(self, name: str) -> str:
+        if name not in self.sources:
+            try:
+                source = self.env.loader.get_source(self.env, name)[0]
+                self.sources[name] = digest(source)
+            except TemplateNotFound:
+                self.sources[name] = ''
+        return self.sources[name]
+
+    def referenced(self, name: str) -> Optional[Set[str]]:
+        """Names of the templates directly referenced by this one, None if unknown
+        """
+        if name not in self.references:
+            refs: Optional[Set[str]] = set()
+            try:
+                source = self.env.loader.get_source(self.env, name)[0]
+                for ref in meta.find_referenced_templates(self.env.parse(source)):
+                    if ref is None:
+                        refs = None
+                        break
+                    refs.add(ref)
+            except TemplateNotFound:
+                pass
+            self.references[name] = refs
+        return self.references[name]
+
+    def loaded(self, name: str) -> Optional[Set[str]]:
+        """Names of all templates loaded when rendering this one, None if unknown
+        """
+        names: Set[str] = set()
+        todo = [name]
+        while todo:
+            current = todo.pop()
+            if current in names:
+                continue
+            names.add(current)
+            refs = self.referenced(current)
+            if refs is None:
+                return None
+            todo += refs
+        return names
+
+    def digest(self, name: str) -> str:
+        """Hash of the names and sources of all templates loaded by this one
+        """
+        if name not in self.digests:
+            names = self.loaded(name)
+            if names is None:
+                names = set(self.env.list_templates()) | {name}
+            self.digests[name] = digest(*[
+                f'{n}:{self.source_digest(n)}' for n in sorted(names)])
+        return self.digests[name]
+
+
+def load_manifest(root_dir: str) -> Manifest:
+    """Read the manifest of the previous build
+
+    Returns an empty manifest if there is none, or if it was written
+    by an incompatible version.
+    """
+    fpath = join(root_dir, CACHE_DIRNAME, 'manifest.json')
+    data = dict()
+    if isfile(fpath):
+        with open(fpath) as fhandle:
+            try:
+                data = json.load(fhandle)
+            except json.JSONDecodeError:
+                logger.warning('Ignoring unreadable build manifest')
+    if data.get('format') != MANIFEST_FORMAT:
+        data = dict()
+    return Manifest(fpath, data.get('settings', ''), data.get('pages', dict()))
+
+
+def remove_manifest(root_dir: str) -> None:
+    """Remove the manifest, if any, so that a later build starts afresh
+    """
+    fpath = join(root_dir, CACHE_DIRNAME, 'manifest.json')
+    if isfile(fpath):
+        remove(fpath)
+
+
+class Manifest:
+    """Records of the pages built, by source path.
+
+    Attributes:
+        fpath: Location of the manifest file, None to keep it in memory only
+        settings: Hash of the build-wide dependencies of the previous build
+        previous: Page records of the previous build
+        pages: Page records of the current build
+        keys: Keys of the nodes of the current tree, by node id
+        build_all: Whether build-wide dependencies changed since the previous build
+    """
+
+    def __init__(self, fpath: Optional[str], settings: str, pages: Dict[str, PageRecord]) -> None:
+        self.fpath = fpath
+        self.settings = settings
+        self.previous = pages
+        self.pages: Dict[str, PageRecord] = dict()
+        self.dist_dir = ''
+        self.templates: Optional[TemplateDependencies] = None
+        self.keys: Dict[int, str] = dict()
+        self.nodes: Dict[str, ContentNode] = dict()
+        self.digests: Dict[str, str] = dict()
+        self.build_all = True
+
+    def is_empty(self) -> bool:
+        return len(self.previous) == 0
+
+    def begin(
+            self,
+            root: ContentNode,
+            settings: str,
+            dist_dir: str,
+            templates: Optional[TemplateDependencies] = None
+        ) -> None:
+        """Start a new build
+
+        If the build-wide dependencies changed, every page is built again.
+        The pages of the previous build become the records to compare with.
+
+        Args:
+            root: Root node of the content tree
+            settings: Hash of the configuration
+            dist_dir: Directory that the pages are written to
+            templates: Dependencies between the templates of the theme
+        """
+        if self.pages:
+            self.previous = self.pages
+        self.build_all = settings != self.settings
+        if self.build_all and self.previous:
+            logger.info('Configuration changed, building all pages')
+        self.settings = settings
+        self.dist_dir = dist_dir
+        self.templates = templates
+        self.pages = dict()
+        self.nodes = dict(iter_keyed(root))
+        self.keys = dict((id(node), key) for (key, node) in self.nodes.items())
+        self.digests = dict()
+
+    def node_digest(self, key: str) -> str:
+        """Hash of a node of the current tree, empty if there is none by that key
+        """
+        if key not in self.digests:
+            node = self.nodes.get(key)
+            if node is None:
+                self.digests[key] = ''
+            else:
+                children = [child.name for child in node.branches + node.leaves]
+                self.digests[key] = digest(hash_node(node), *children)
+        return self.digests[key]
+
+    def is_outdated(self, node: ContentNode, out_fpath: str, template: str = '') -> bool:
+        """Register the page for this node and determine whether it has to be rendered
+
+        The nodes the page depends on are taken from the previous build,
+        and updated with `record_reads` if the page is rendered again.
+
+        Args:
+            node: Node to be rendered
+            out_fpath: Full path of the output file
+            template: Name of the template the page is rendered with
+
+        Returns:
+            bool: True if the source, dependencies or output changed
+        """
+        record: PageRecord = dict(
+            content=digest(node.content_md),
+            front=hash_front(node.front),
+            modified=last_modified(node),
+            templates=self.templates.digest(template) if self.templates else '',
+            output=relpath(out_fpath, self.dist_dir),
+        )
+        previous = self.previous.get(node.source_path, dict())
+        record['deps'] = previous.get('deps', dict())
+        self.pages[node.source_path] = record
+        if self.build_all or previous != record:
+            return True
+        if any(self.node_digest(key) != value for (key, value) in record['deps'].items()):
+            return True
+        return not isfile(out_fpath)
+
+    def record_reads(self, node: ContentNode, keys: Iterable[str]) -> None:
+        """Set the nodes that rendering the page of this node read
+
+        Args:
+            node: Node that was rendered
+            keys: Keys of the nodes read, see `iter_keyed`
+        """
+        self.pages[node.source_path]['deps'] = dict(
+            (key, self.node_digest(key)) for key in sorted(keys))
+
+    def remove_stale(self) -> int:
+        """Delete output files of pages that no longer exist or moved
+
+        Returns:
+            int: Number of files removed
+        """
+        current_outputs = set(r['output'] for r in self.pages.values())
+        n_removed = 0
+        for record in self.previous.values():
+            if record['output'] in current_outputs:
+                continue
+            out_fpath = join(self.dist_dir, record['output'])
+            if isfile(out_fpath):
+                remove(out_fpath)
+                n_removed += 1
+                logger.info(f'Removed {record["output"]}')
+        return n_removed
+
+    def save(self) -> None:
+        if self.fpath is None:
+            return
+        makedirs(dirname(self.fpath), exist_ok=True)
+        with open(self.fpath, 'w') as fhandle:
+            json.dump(dict(
+                format=MANIFEST_FORMAT,
+                settings=self.settings,
+                pages=self.pages
+            ), fhandle)
@@ -1,30 +1,64 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING, List, Dict, Optional
-from sys import maxsize as SYS_MAX_SIZE
+from typing import TYPE_CHECKING, Dict, Optional, Sequence, Tuple, Callable, TypeVar
+from functools import wraps
+from sys import maxsize as SYS_MAX_SIZE, intern
 from os.path import dirname, basename
 from datetime import datetime
+from markdown import markdown
 if TYPE_CHECKING:
     from syrinx.config import SyrinxConfiguration, BuildMetaInfo
 
+MARKDOWN_EXTENSIONS = ['fenced_code', 'tables']
+
+## shared by all leaves, which never have children
+NO_CHILDREN: Tuple[ContentNode, ...] = ()
+
+## derived properties that are computed once, stored in slots of the same name
+MEMOIZED = ('_address', '_buildPage', '_includeInSitemap', '_lastModified')
+
+T = TypeVar('T')
+
+
+def memoized(method: Callable[[ContentNode], T]) -> property:
+    """Property that stores its value in a slot until the node is invalidated
+    """
+    slot = f'_{method.__name__}'
+    assert slot in MEMOIZED
+
+    @wraps(method)
+    def getter(self: ContentNode) -> T:
+        try:
+            return getattr(self, slot)
+        except AttributeError:
+            value = method(self)
+            setattr(self, slot, value)
+            return value
+    return property(getter)
+
 
 def makeBranchNode(config: SyrinxConfiguration, name: str) -> ContentNode:
     node = ContentNode(config)
-    node.name = name
+    node.name = intern(name)
     node.isLeaf = False
     return node
 
 
 def makeLeafNode(config: SyrinxConfiguration) -> ContentNode:
-    node = ContentNode(config)
-    node.isLeaf = True
-    return node
+    return ContentNode(config, isLeaf=True)
 
 
 class ContentNode:
+    """A page or directory in the content tree
+
+    Uses slots to keep the memory footprint of large trees down.
+    """
+    __slots__ = ('name', 'leaves', 'branches', 'content_md', '_content_html',
+                 'front', 'path', 'source_path', 'config', 'isLeaf', 'fpath') + MEMOIZED
     name: str
-    leaves: List[ContentNode]
-    branches: List[ContentNode]
-    content_html: str
+    leaves: Sequence[ContentNode]
+    branches: Sequence[ContentNode]
+    content_md: str
+    _content_html: Optional[str]
     front: Dict[str, str]
     path: str
     source_path: str
@@ -32,26 +66,61 @@ class ContentNode:
     isLeaf: bool
     fpath: str
 
-    def __init__(self, config: SyrinxConfiguration):
-        self.leaves = []
-        self.branches = []
+    def __init__(self, config: SyrinxConfiguration, isLeaf: bool = False):
+        if isLeaf:
+            self.leaves = NO_CHILDREN
+            self.branches = NO_CHILDREN
+        else:
+            self.leaves = []
+            self.branches = []
         self.front = {}
+        self.content_md = ''
+        self._content_html = ''
         self.config = config
-        self.isLeaf = False
+        self.isLeaf = isLeaf
         self.source_path = ''
 
-    def setContent(self, fpath: str, front: Dict[str, str], html: str) -> None:
+    def setContent(
+            self,
+            fpath: str,
+            front: Dict[str, str],
+            md: str,
+            html: Optional[str] = None
+        ) -> None:
+        """Set the contents of this node
+
+        The markdown is only converted to html when `content_html`
+        is first used, unless the html is passed here.
+        """
+        self.invalidate()
         self.fpath = fpath
         self.front = front
-        self.content_html = html
+        self.content_md = md
+        self._content_html = html
         self.source_path = fpath
-        self.path = dirname(fpath)
-        if self.path == '/':
-            self.path = ''
+        path = dirname(fpath)
+        self.path = '' if path == '/' else intern(path)
         if self.isLeaf:
             fparts = basename(fpath).split('.')
             self.name = fparts[0]
 
+    def invalidate(self) -> None:
+        """Forget derived properties, to be called when content or children change
+        """
+        for slot in MEMOIZED:
+            if hasattr(self, slot):
+                delattr(self, slot)
+
+    @property
+    def content_html(self) -> str:
+        if self._content_html is None:
+            self._content_html = markdown(self.content_md, extensions=MARKDOWN_EXTENSIONS)
+        return self._content_html
+
+    @content_html.setter
+    def content_html(self, html: str) -> None:
+        self._content_html = html
+
     @property
     def meta(self) -> BuildMetaInfo:
         return self.config.meta
@@ -63,7 +132,7 @@ class ContentNode:
         else:
             return SYS_MAX_SIZE
         
-    @property
+    @memoized
     def buildPage(self) -> bool:
         if self.isLeaf and not self.config.leaf_pages:
             return False
@@ -79,7 +148,7 @@ class ContentNode:
         else:
             return self.name.replace('_', ' ').title()
         
-    @property
+    @memoized
     def address(self) -> Optional[str]:
         """Full, canonical URL of this node
 
@@ -102,7 +171,7 @@ class ContentNode:
                 trail = '/'
         return f'https://{self.config.domain}{self.path}{trail}'
 
-    @property
+    @memoized
     def lastModified(self) -> Optional[datetime]:
         # First check for direct LastModified entry
         if 'LastModified' in self.front:
@@ -119,7 +188,7 @@ class ContentNode:
 
         return None
     
-    @property
+    @memoized
     def includeInSitemap(self) -> bool:
         if not self.buildPage:
             return False
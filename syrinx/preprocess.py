@@ -1,5 +1,7 @@
 """Convert data files to content
 
+Data files can be TSV, Parquet or Feather files, or a TOML file
+describing a SQLite table or query.
 The archetype used will be based on the filename of the data file.
 Each row is considered one record.
 The header (1st) row will be used as keys.
@@ -7,20 +9,361 @@ The first column is used as name for the content item.
 Each column will be converted to a variable in the front matter 
 """
 from __future__ import annotations
-from typing import TYPE_CHECKING, Dict
-from os.path import join, isdir, basename
+from typing import TYPE_CHECKING, Dict, List, Set, Tuple, Iterator, Iterable, Optional, Callable
+from os.path import join, isdir, isfile, basename, dirname, getsize
 from os import makedirs, remove
-import logging
+import logging, sqlite3, tomllib
 from glob import glob
-from jinja2 import Environment, FileSystemLoader, select_autoescape
-from pandas import read_csv
+from jinja2 import Environment, FileSystemLoader, select_autoescape, meta
+from pandas import read_csv, read_sql
+from pandas.api.types import is_bool_dtype, is_integer_dtype, is_float_dtype, is_object_dtype
 from numpy import nan
+from syrinx.cache import open_bytecode_cache
 if TYPE_CHECKING:
     from jinja2 import Template
+    from pandas import DataFrame
+    from pyarrow import RecordBatch
     from syrinx.config import SyrinxConfiguration
 logger = logging.getLogger(__name__)
 
-def preprocess(root_dir: str, config: SyrinxConfiguration) -> None:
+## name of the index column, labels and records of a chunk of rows
+Chunk = Tuple[str, List, List[Dict]]
+
+## label, frontmatter and markdown of records by collection, for records kept in memory
+DataRecords = Dict[str, List[Tuple[str, Dict, str]]]
+
+## number of data rows held in memory at a time
+CHUNK_SIZE = 10_000
+
+
+def column_name(col: str) -> str:
+    """Column name as used in the archetype, without whitespace
+    """
+    return col.strip().replace(' ', '_')
+
+
+def archetype_columns(env: Environment, fname: str) -> Optional[Set[str]]:
+    """Names of the variables used in the archetype
+
+    Returns None if the archetype includes, imports or extends other
+    templates, as then the variables used can't be told from its source alone.
+    """
+    source = env.loader.get_source(env, fname)[0]
+    ast = env.parse(source)
+    if any(True for _ in meta.find_referenced_templates(ast)):
+        return None
+    return meta.find_undeclared_variables(ast)
+
+
+def archetype_body(env: Environment, fname: str) -> Template:
+    """The archetype without its frontmatter, for records kept in memory
+
+    Their frontmatter is taken from the data directly.
+    """
+    source = env.loader.get_source(env, fname)[0]
+    lines = source.splitlines(keepends=True)
+    if lines and lines[0].strip() in ('+++', '---'):
+        for n, line in enumerate(lines[1:], start=1):
+            if line.strip() == lines[0].strip():
+                source = ''.join(lines[n+1:])
+                break
+    ## templates from strings would be autoescaped by default, archetypes are not
+    return env.overlay(autoescape=False).from_string(source)
+
+
+def project(names: List[str], wanted: Optional[Set[str]]) -> Optional[List[str]]:
+    """Columns to load: the first (label) column and those used in the archetype
+
+    Returns None, meaning all columns, if the columns used are not known.
+    """
+    if wanted is None:
+        return None
+    return names[:1] + [col for col in names[1:] if column_name(col) in wanted]
+
+
+def prepare_chunk(df: DataFrame, archetype_name: str, offset: int) -> Chunk:
+    """Turn a frame of rows indexed by label into native python records
+
+    Args:
+        df: The rows, indexed by the first column
+        archetype_name: Name of the collection
+        offset: Number of rows in previous chunks, to continue sequence numbers
+    """
+
+    ## get rid of whitespace in columns:
+    df.columns = [column_name(col) for col in df.columns]
+
+    ## turns nans to None
+    df.replace([nan], [None], inplace=True)
+
+    ## add sequence number if not provided
+    if 'SequenceNumber' not in df.columns:
+        df['SequenceNumber'] = range(offset, offset + len(df))
+
+    df['Archetype'] = archetype_name
+
+    ## convert columns to native python records in bulk, not row by row
+    return df.index.name, df.index.tolist(), df.to_dict('records')
+
+
+def combine_dtypes(dtypes: Set) -> object:
+    """The type pandas would infer for a column from the types of its chunks
+
+    Integers and floats, which is how integers with missing values are
+    read, combine into floats. Booleans with missing values are read as
+    objects, and so are chunks that are all missing values alongside them.
+    Any other mix is read as text.
+    """
+    if len(dtypes) == 1:
+        return next(iter(dtypes))
+    if all(is_integer_dtype(d) or is_float_dtype(d) for d in dtypes):
+        return 'float64'
+    if all(is_bool_dtype(d) or is_float_dtype(d) or is_object_dtype(d) for d in dtypes):
+        return object
+    return str
+
+
+def tsv_dtypes(fpath: str, usecols: Optional[List[str]], chunksize: int) -> Dict[str, object]:
+    """Types of the columns of a TSV data file, inferred from all of its rows
+
+    Read chunk by chunk, so that memory stays bounded. Object columns are
+    left out, as reading them as objects would keep booleans as text,
+    while each chunk infers the same values for them as the whole file.
+    """
+    dtypes: Dict[str, Set] = dict()
+    for df in read_csv(fpath, sep='\t', usecols=usecols, chunksize=chunksize):
+        for col, dtype in df.dtypes.items():
+            dtypes.setdefault(col, set()).add(dtype)
+    combined = dict((col, combine_dtypes(types)) for (col, types) in dtypes.items())
+    return dict((col, dtype) for (col, dtype) in combined.items() if not is_object_dtype(dtype))
+
+
+def read_tsv(
+        fpath: str,
+        archetype_name: str,
+        wanted: Optional[Set[str]] = None,
+        chunksize: int = CHUNK_SIZE
+    ) -> Iterator[Chunk]:
+    """Read a TSV data file a chunk of rows at a time
+
+    Only one chunk is in memory at a time, so files larger than memory
+    can be processed. Sequence numbers continue across chunks. Column
+    types are inferred from the whole file first, so that values don't
+    depend on which chunk they are in.
+    """
+    usecols = None
+    if wanted is not None:
+        usecols = project(read_csv(fpath, sep='\t', nrows=0).columns.tolist(), wanted)
+    dtype = tsv_dtypes(fpath, usecols, chunksize)
+    offset = 0
+    for df in read_csv(fpath, sep='\t', index_col=0, usecols=usecols, dtype=dtype,
+                       chunksize=chunksize):
+        yield prepare_chunk(df, archetype_name, offset)
+        offset += len(df)
+
+
+def import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError('Reading Parquet or Feather data files requires '
+                          'pyarrow, install it with: pip install pyarrow') from None
+    return pyarrow
+
+
+def read_batches(batches: Iterable[RecordBatch], archetype_name: str) -> Iterator[Chunk]:
+    offset = 0
+    for batch in batches:
+        ## the pandas metadata is ignored, so the first column is the label
+        df = batch.to_pandas(ignore_metadata=True)
+        df.set_index(df.columns[0], inplace=True)
+        yield prepare_chunk(df, archetype_name, offset)
+        offset += len(df)
+
+
+def read_parquet(
+        fpath: str,
+        archetype_name: str,
+        wanted: Optional[Set[str]] = None,
+        chunksize: int = CHUNK_SIZE
+    ) -> Iterator[Chunk]:
+    """Read a memory mapped Parquet data file a chunk of rows at a time
+    """
+    import_pyarrow()
+    from pyarrow.parquet import ParquetFile
+    pfile = ParquetFile(fpath, memory_map=True)
+    columns = project(pfile.schema_arrow.names, wanted)
+    batches = pfile.iter_batches(batch_size=chunksize, columns=columns)
+    yield from read_batches(batches, archetype_name)
+
+
+def read_feather(
+        fpath: str,
+        archetype_name: str,
+        wanted: Optional[Set[str]] = None,
+        chunksize: int = CHUNK_SIZE
+    ) -> Iterator[Chunk]:
+    """Read a memory mapped Feather (Arrow IPC) data file a chunk of rows at a time
+    """
+    pyarrow = import_pyarrow()
+    from pyarrow.ipc import open_file
+    with pyarrow.memory_map(fpath) as source:
+        reader = open_file(source)
+        columns = project(reader.schema.names, wanted)
+
+        def iter_batches() -> Iterator[RecordBatch]:
+            for b in range(reader.num_record_batches):
+                batch = reader.get_batch(b)
+                if columns is not None:
+                    batch = batch.select(columns)
+                for start in range(0, batch.num_rows, chunksize):
+                    yield batch.slice(start, chunksize)
+
+        yield from read_batches(iter_batches(), archetype_name)
+
+
+def quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def read_sqlite(
+        fpath: str,
+        archetype_name: str,
+        wanted: Optional[Set[str]] = None,
+        chunksize: int = CHUNK_SIZE
+    ) -> Iterator[Chunk]:
+    """Read a table or query from a SQLite database a chunk of rows at a time
+
+    The data file is a small TOML file naming the database, relative to
+    the data directory, and either a table or a query:
+
+        database = "shop.sqlite"
+        table = "products"
+    """
+    with open(fpath, 'rb') as fhandle:
+        source = tomllib.load(fhandle)
+    db_fpath = join(dirname(fpath), source['database'])
+    if not isfile(db_fpath):
+        raise FileNotFoundError(f'No such database: {db_fpath}')
+    if 'query' in source:
+        selection = f'({source["query"]})'
+    elif 'table' in source:
+        selection = quote(source['table'])
+    else:
+        raise ValueError(f'{basename(fpath)} needs either a table or a query')
+
+    connection = sqlite3.connect(db_fpath)
+    try:
+        cursor = connection.execute(f'SELECT * FROM {selection} LIMIT 0')
+        names = [desc[0] for desc in cursor.description]
+        columns = project(names, wanted) or names
+        query = f'SELECT {", ".join(map(quote, columns))} FROM {selection}'
+        offset = 0
+        for df in read_sql(query, connection, index_col=columns[0], chunksize=chunksize):
+            yield prepare_chunk(df, archetype_name, offset)
+            offset += len(df)
+    finally:
+        connection.close()
+
+
+DataReader = Callable[[str, str, Optional[Set[str]], int], Iterator[Chunk]]
+
+## readers of data files by file extension
+DATA_READERS: Dict[str, DataReader] = {
+    '.tsv': read_tsv,
+    '.parquet': read_parquet,
+    '.feather': read_feather,
+    '.sqlite.toml': read_sqlite,
+}
+
+
+def find_reader(fname: str) -> Optional[DataReader]:
+    for ext, reader in DATA_READERS.items():
+        if fname.endswith(ext):
+            return reader
+    return None
+
+
+def write_if_changed(fpath: str, content: str) -> bool:
+    """Write the content to the file, unless it already has that content
+
+    Leaving unchanged files alone keeps their modification time, so file
+    watchers and caches downstream don't see them as changed.
+
+    Returns:
+        bool: Whether the file was written
+    """
+    data = content.encode()
+    try:
+        if getsize(fpath) == len(data):
+            with open(fpath, 'rb') as fhandle:
+                if fhandle.read() == data:
+                    return False
+    except FileNotFoundError:
+        pass
+    with open(fpath, 'wb') as fhandle:
+        fhandle.write(data)
+    return True
+
+
+def write_records(
+        archetype: Template,
+        index_name: str,
+        labels: List,
+        records: List[Dict],
+        collection_dir: str,
+        batch_size: int = 1000
+    ) -> int:
+    """Render records through the archetype and write one content file each
+
+    Records are rendered a batch at a time, then the batch is written out.
+    Files that already have the rendered content are not written again.
+
+    Returns:
+        int: Number of files written
+    """
+    n_written = 0
+    for start in range(0, len(records), batch_size):
+        batch_labels = labels[start:start+batch_size]
+        outputs = [
+            archetype.render(record | {index_name: label})
+            for label, record in zip(batch_labels, records[start:start+batch_size])
+        ]
+        for label, output in zip(batch_labels, outputs):
+            n_written += write_if_changed(join(collection_dir, f'{label}.md'), output)
+    return n_written
+
+
+def render_records(
+        body: Template,
+        index_name: str,
+        labels: List,
+        records: List[Dict]
+    ) -> List[Tuple[str, Dict, str]]:
+    """Frontmatter and rendered markdown of each record, to be kept in memory
+    """
+    rendered = []
+    for label, record in zip(labels, records):
+        front = record | {index_name: label}
+        rendered.append((str(label), front, body.render(front)))
+    return rendered
+
+
+def preprocess(
+        root_dir: str,
+        config: SyrinxConfiguration,
+        collections: Optional[Set[str]] = None
+    ) -> DataRecords:
+    """Render data files through their archetypes into content files
+
+    With the *data_in_memory* option, records are returned instead, to be
+    added to the content tree by `read`. Their content files are then only
+    written with the *data_write_files* option.
+    If *collections* are named, only their data files are processed.
+
+    Returns:
+        DataRecords: Records by collection, empty unless kept in memory
+    """
 
     assert isdir(root_dir)
 
@@ -28,47 +371,64 @@ def preprocess(root_dir: str, config: SyrinxConfiguration) -> None:
     archetypes: Dict[str, Template] = dict()
     env = Environment(
         loader=FileSystemLoader(join(root_dir, 'archetypes')),
-        autoescape=select_autoescape()
+        autoescape=select_autoescape(),
+        bytecode_cache=open_bytecode_cache(root_dir) if config.cache else None
     )
 
+    columns: Dict[str, Optional[Set[str]]] = dict()
     for fpath in archetype_files:
         fname = basename(fpath)
         archetype_name = fname.split('.')[0]
         archetypes[archetype_name] = env.get_template(fname)
+        columns[archetype_name] = archetype_columns(env, fname)
 
 
-    data_files = glob(join(root_dir, 'data', '*.tsv'))
+    data_files = sorted(glob(join(root_dir, 'data', '*')))
 
+    done: Set[str] = set()
+    data_records: DataRecords = dict()
     for fpath in data_files:
+        reader = find_reader(basename(fpath))
+        if reader is None:
+            continue
         archetype_name = basename(fpath).split('.')[0]
+        if collections is not None and archetype_name not in collections:
+            continue
         if archetype_name not in archetypes:
             raise ValueError(f'No archetype for {archetype_name}')
+        if archetype_name in done:
+            raise ValueError(f'More than one data file for {archetype_name}')
+        done.add(archetype_name)
         archetype = archetypes[archetype_name]
 
         collection_dir = join(root_dir, 'content', archetype_name)
         makedirs(collection_dir, exist_ok=True)
 
-        if config.clean:
-            stale_content = glob("*.md", root_dir=collection_dir)
-            [remove(join(collection_dir, filename)) for filename in stale_content if "index" not in filename]
-
-        df = read_csv(fpath, sep='\t', index_col=0)
-
-        ## get rid of whitespace in columns:
-        df.columns = [col.strip().replace(' ', '_') for col in df.columns]
-
-        ## turns nans to None
-        df.replace([nan], [None], inplace=True)
+        logger.info(f'Preprocessing {archetype_name}')
 
-        ## add sequence number if not provided
-        if 'SequenceNumber' not in df.columns:
-            df['SequenceNumber'] = list(range(len(df)))
+        ## records kept in memory use all columns as frontmatter
+        in_memory = config.data_in_memory
+        write_files = config.data_write_files or not in_memory
+        wanted = None if in_memory else columns[archetype_name]
+        if in_memory:
+            body = archetype_body(env, basename(archetype.filename))
+            collection = data_records[archetype_name] = []
 
-        df['Archetype'] = [archetype_name]*len(df)
+        current: Set[str] = set()
+        n_records, n_written = 0, 0
+        for index_name, chunk_labels, records in reader(fpath, archetype_name, wanted, CHUNK_SIZE):
+            if write_files:
+                n_written += write_records(archetype, index_name, chunk_labels, records, collection_dir)
+                current.update(f'{label}.md' for label in chunk_labels)
+            if in_memory:
+                collection.extend(render_records(body, index_name, chunk_labels, records))
+            n_records += len(records)
+        logger.info(f'Wrote {n_written} of {n_records} {archetype_name} files')
 
-        logger.info(f'Preprocessing {archetype_name}')
+        ## remove files of records that are no longer in the data
+        if config.clean:
+            stale_content = glob("*.md", root_dir=collection_dir)
+            [remove(join(collection_dir, filename)) for filename in stale_content
+                if "index" not in filename and filename not in current]
 
-        for label, row in df.iterrows():
-            output = archetype.render(dict(row) | {df.index.name: label})
-            with open(join(collection_dir, f'{label}.md'), 'w') as fhandle:
-                fhandle.write(output)
+    return data_records
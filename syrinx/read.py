@@ -1,15 +1,18 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING, Dict, Tuple
+from typing import TYPE_CHECKING, Dict, Tuple, List, Optional, Callable, BinaryIO
 from os.path import dirname, basename, join
 from os import walk
+from concurrent.futures import ProcessPoolExecutor
 from tomllib import loads as read_toml
 from yaml import safe_load as read_yaml
 import logging
 from markdown import markdown
 from syrinx.exceptions import ContentError
-from syrinx.node import ContentNode, makeBranchNode, makeLeafNode
+from syrinx.node import ContentNode, makeBranchNode, makeLeafNode, MARKDOWN_EXTENSIONS
 if TYPE_CHECKING:
     from syrinx.config import SyrinxConfiguration
+    from syrinx.cache import ParseCache
+    from syrinx.preprocess import DataRecords
 logger = logging.getLogger(__name__)
 """
 This section is just about reading and interpreting the content
@@ -17,12 +20,48 @@ This section is just about reading and interpreting the content
 
 
 def reorder_children(node: ContentNode):
+    if node.isLeaf:
+        ## leaves share an empty tuple for their children
+        return
     node.leaves = sorted(node.leaves, key=lambda n: (n.sequenceNumber, n.name))
     node.branches = sorted(node.branches, key=lambda n: (n.sequenceNumber, n.name))
+    node.invalidate()
     for child in node.branches:
         reorder_children(child)
 
 
+FRONTMATTER_PARSERS: Dict[bytes, Callable[[str], Dict]] = {
+    b'+++': read_toml,
+    b'---': read_yaml,
+}
+
+
+def scan_frontmatter(fhandle: BinaryIO) -> Tuple[Optional[Dict], int]:
+    """Read the frontmatter at the start of a file opened in binary mode.
+
+    Reading stops at the closing marker, so the file handle is left
+    positioned at the start of the main contents.
+
+    Args:
+        fhandle (BinaryIO): File handle at the start of the file
+
+    Returns:
+        Tuple[Optional[Dict], int]: Dictionary with frontmatter attributes, 
+            or None if there is no frontmatter, and the byte offset at which 
+            the main contents start
+    """
+    marker = fhandle.readline().strip()
+    parser = FRONTMATTER_PARSERS.get(marker)
+    if parser is not None:
+        fm_lines = []
+        for line in iter(fhandle.readline, b''):
+            if line.strip() == marker:
+                return parser(b''.join(fm_lines).decode()) or dict(), fhandle.tell()
+            fm_lines.append(line)
+    fhandle.seek(0)
+    return None, 0
+
+
 def read_file(fpath: str) -> Tuple[Dict, str]:
     """Read a single markdown content file and 
     return frontmatter as dictionary and contents as string.
@@ -36,28 +75,55 @@ def read_file(fpath: str) -> Tuple[Dict, str]:
         Tuple[Dict, str]: Dictionary with frontmatter attributes, and 
             string with main contents
     """
-    with open(fpath) as fhandle:
-        lines = fhandle.readlines()
-    formats = [('+++', read_toml), ('---', read_yaml)]
-    for marker, parser in formats:
-        marker_lines = [l for (l, line) in enumerate(lines) if line.strip() == marker]
-        if len(marker_lines) >= 2:
-            fm_string = ''.join(lines[1:marker_lines[1]])
-            fm_dict = parser(fm_string)
-            md_content = ''.join(lines[marker_lines[1]+1:])
-            break
-    else:
+    with open(fpath, 'rb') as fhandle:
+        fm_dict, _ = scan_frontmatter(fhandle)
+        md_content = fhandle.read().decode()
+    if fm_dict is None:
         fm_dict = dict()
-        md_content = ''.join(lines)
         logger.warning(f'No frontmatter found in {fpath}')
     return fm_dict, md_content
 
 
-def read(root_dir: str, config: SyrinxConfiguration) -> ContentNode:
+def parse_file(fpath: str, convert: bool = True) -> Tuple[Dict, str, Optional[str]]:
+    """Read a single markdown content file and convert its contents to html
+
+    Args:
+        fpath (str): Full path to markdown file
+        convert (bool): Whether to convert the markdown to html
+
+    Returns:
+        Tuple[Dict, str, Optional[str]]: Dictionary with frontmatter attributes,
+            string with main contents, and string with html contents 
+            or None if not converted
+    """
+    fm_dict, md_content = read_file(fpath)
+    html = markdown(md_content, extensions=MARKDOWN_EXTENSIONS) if convert else None
+    return fm_dict, md_content, html
+
+
+def read(
+        root_dir: str,
+        config: SyrinxConfiguration,
+        cache: Optional[ParseCache] = None,
+        records: Optional[DataRecords] = None
+    ) -> ContentNode:
+    """Read the content directory into a tree of nodes
+
+    The directory tree is walked first, then the files are parsed, 
+    across `config.jobs` worker processes if more than one. Markdown is converted
+    to html when first used, unless it is parsed in workers or a cache is
+    passed. With a cache, only files that are not in the cache yet are
+    parsed and converted.
+    Data records kept in memory by `preprocess` are added as leaves of
+    their collection, instead of any content files there.
+    """
 
     content_dir = join(root_dir, 'content')
+    records = records or dict()
+    collection_dirs = set(join(content_dir, name) for name in records)
 
     tree: Dict[str, ContentNode] = dict()
+    files: List[Tuple[ContentNode, str]] = []
     root = makeBranchNode(config, '')
     for (dirpath, _, fnames) in walk(content_dir):
 
@@ -79,17 +145,53 @@ def read(root_dir: str, config: SyrinxConfiguration) -> ContentNode:
             if not fname.endswith('.md'):
                 continue
 
-            fpath = join(dirpath, fname)
-            fm_dict, md_content = read_file(fpath)
+            if fname != 'index.md' and dirpath in collection_dirs:
+                continue
 
             if fname == 'index.md':
                 node = indexNode
             else:
                 node = makeLeafNode(config)
                 indexNode.leaves.append(node)
-
-            node.setContent(fpath.replace(content_dir, ''), fm_dict, markdown(md_content, extensions=['fenced_code', 'tables']))
-            logger.info(f'Read {node.source_path}')
+            files.append((node, join(dirpath, fname)))
+
+    parsed: List[Optional[Tuple[Dict, str, Optional[str]]]] = [None] * len(files)
+    keys: List[str] = []
+    if cache is not None:
+        for f, (_, fpath) in enumerate(files):
+            with open(fpath, 'rb') as fhandle:
+                keys.append(cache.key(fhandle.read()))
+            parsed[f] = cache.get(keys[f])
+    todo = [f for f in range(len(files)) if parsed[f] is None]
+
+    fpaths = [files[f][1] for f in todo]
+    jobs = config.jobs
+    parallel = jobs > 1 and len(todo) > 1
+    ## parsing frontmatter alone does not pay for the pool, so workers convert too
+    convert = [cache is not None or parallel] * len(todo)
+    if parallel:
+        chunksize = max(1, len(fpaths) // (jobs * 4))
+        with ProcessPoolExecutor(jobs) as executor:
+            results = list(executor.map(parse_file, fpaths, convert, chunksize=chunksize))
+    else:
+        results = map(parse_file, fpaths, convert)
+
+    for f, result in zip(todo, results):
+        parsed[f] = result
+        if cache is not None:
+            cache.put(keys[f], *result)
+
+    for (node, fpath), (fm_dict, md_content, html) in zip(files, parsed):
+        node.setContent(fpath.replace(content_dir, ''), fm_dict, md_content, html)
+        logger.info(f'Read {node.source_path}')
+
+    for name, collection in records.items():
+        indexNode = tree[join(content_dir, name)]
+        for (label, fm_dict, md_content) in collection:
+            node = makeLeafNode(config)
+            node.setContent(f'/{name}/{label}.md', fm_dict, md_content)
+            indexNode.leaves.append(node)
+        logger.info(f'Added {len(collection)} {name} records')
 
     reorder_children(root)
 
@@ -1,9 +1,11 @@
 from argparse import Namespace
+from contextlib import nullcontext
 from os.path import abspath, isdir
 from syrinx.build import build
 from syrinx.read import read
 from syrinx.preprocess import preprocess
 from syrinx.config import configure
+from syrinx.cache import open_parse_cache
 
 
 def run_pipeline(args: Namespace):
@@ -19,7 +21,8 @@ def run_pipeline(args: Namespace):
     root_dir = abspath(args.dir)
     assert isdir(root_dir)
     config = configure(args)
-    preprocess(root_dir, config)
-    root = read(root_dir, config)
+    records = preprocess(root_dir, config)
+    with open_parse_cache(root_dir) if config.cache else nullcontext() as cache:
+        root = read(root_dir, config, cache=cache, records=records)
     build(root, root_dir, config)
     return root
@@ -0,0 +1,236 @@
+"""Build state kept in memory between rebuilds of the development server."""
+from __future__ import annotations
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Set, Tuple
+from os.path import abspath, basename, dirname, isfile, join, relpath, sep
+from contextlib import nullcontext
+from pathlib import PurePath
+from syrinx.assets import source_dirs, sync_asset
+from syrinx.branches import read_branches
+from syrinx.build import build, iter_nodes, make_environment
+from syrinx.cache import open_bytecode_cache, open_parse_cache
+from syrinx.config import configure
+from syrinx.manifest import Manifest, remove_manifest
+from syrinx.preprocess import preprocess
+from syrinx.read import parse_file, read, reorder_children
+from syrinx.server.rebuild_plan import RebuildPlan, ASSET, BRANCHES, CONFIG, CONTENT
+if TYPE_CHECKING:
+    from argparse import Namespace
+    from jinja2 import Environment
+    from syrinx.config import SyrinxConfiguration
+    from syrinx.node import ContentNode
+    from syrinx.preprocess import DataRecords
+
+
+class BuildSession:
+    """Configuration, content tree and template environment of a site,
+    kept between builds.
+
+    The first build goes through the whole pipeline. After that, only
+    the work needed for the changed files is done, and pages are
+    rendered incrementally, so that only the pages that read a changed
+    node are built again. Unless the project builds incrementally, the
+    manifest for this is kept in memory rather than written. The Jinja environment reloads templates that
+    changed on disk, and keeps the others compiled.
+
+    Attributes:
+        root_dir: The absolute path to the Syrinx project root.
+        args: Command-line arguments for configuration.
+        config: Configuration of the last full build.
+        root: Root node of the content tree.
+        records: Data records kept in memory by preprocessing.
+        env: Jinja environment for the page templates.
+        nodes: Nodes of the tree by source path.
+        manifest: Pages built in this session, None if the project keeps
+            its own manifest on disk.
+        branches_text: Contents of the branches file as last written or
+            read, to tell changes by others from those of configuring.
+    """
+
+    def __init__(self, args: Namespace) -> None:
+        self.root_dir = abspath(args.dir)
+        self.args = args
+        self.config: Optional[SyrinxConfiguration] = None
+        self.root: Optional[ContentNode] = None
+        self.records: DataRecords = dict()
+        self.env: Optional[Environment] = None
+        self.nodes: Dict[str, ContentNode] = dict()
+        self.branches_text = ''
+        self.manifest: Optional[Manifest] = None
+
+    @property
+    def content_dir(self) -> str:
+        return join(self.root_dir, 'content')
+
+    @property
+    def template_dir(self) -> str:
+        return join(self.root_dir, 'theme', 'templates')
+
+    @property
+    def branches_fpath(self) -> str:
+        return join(self.root_dir, 'branches.toml')
+
+    def read_branches_text(self) -> str:
+        if not isfile(self.branches_fpath):
+            return ''
+        with open(self.branches_fpath) as fhandle:
+            return fhandle.read()
+
+    def build_all(self) -> List[str]:
+        """Configure, preprocess, read and build from scratch.
+
+        Pages are always rendered incrementally, so that later builds
+        can skip the pages that are unaffected by a change. Projects
+        that did not opt into incremental builds get a manifest in
+        memory, and any manifest left on disk is removed, as it no
+        longer describes the dist directory.
+        """
+        self.config = configure(self.args)
+        if self.config.incremental:
+            self.manifest = None
+        else:
+            self.manifest = Manifest(None, '', dict())
+            remove_manifest(self.root_dir)
+        ## configuring records the build time of the current git branch
+        self.branches_text = self.read_branches_text()
+        bytecode_cache = open_bytecode_cache(self.root_dir) if self.config.cache else None
+        self.env = make_environment(self.template_dir, bytecode_cache)
+        self.records = preprocess(self.root_dir, self.config)
+        self.read()
+        return self.render()
+
+    def read(self) -> None:
+        """Read the content directory into a new tree."""
+        with open_parse_cache(self.root_dir) if self.config.cache else nullcontext() as cache:
+            self.root = read(self.root_dir, self.config, cache=cache,
+                             records=self.records)
+        self.nodes = dict((n.source_path, n) for n in iter_nodes(self.root) if n.source_path)
+
+    def render(self) -> List[str]:
+        """Build the pages affected by changes since the previous build.
+
+        Returns:
+            Paths of the pages rendered, relative to the dist directory.
+        """
+        return build(self.root, self.root_dir, self.config, self.env, self.manifest)
+
+    def update(self, fpaths: Iterable[str]) -> Tuple[Optional[List[str]], List[str]]:
+        """Apply changed files to the tree and build the affected pages.
+
+        Args:
+            fpaths: Absolute paths of the files that changed.
+
+        Returns:
+            See `apply`.
+        """
+        return self.apply(RebuildPlan(self.root_dir, fpaths))
+
+    def apply(self, plan: RebuildPlan) -> Tuple[Optional[List[str]], List[str]]:
+        """Do the least work needed to bring the site up to date.
+
+        - Configuration changes start over with a full build.
+        - Branch file changes update the last modified dates, unless
+          the change was made by configuring for the last full build.
+        - Data files and archetypes are preprocessed again, for the
+          collections concerned only, then the content is read again.
+        - Modified content files are read again into their node. If content
+          files were added or removed, the content directory is read again.
+          Files written for collections kept in memory are ignored, as
+          their nodes come from the data records.
+        - Changed assets are copied to the dist directory.
+        - Template changes only need rendering.
+
+        Args:
+            plan: The changed files, by kind.
+
+        Returns:
+            Tuple of the pages rendered and the assets copied or removed,
+            as URL paths relative to the dist directory. Pages is None
+            after a full build, as then any page may have changed.
+        """
+        if self.root is None or plan.changed[CONFIG]:
+            self.build_all()
+            return None, []
+
+        if plan.changed[BRANCHES]:
+            branches_text = self.read_branches_text()
+            if branches_text == self.branches_text:
+                plan.changed[BRANCHES].clear()
+            else:
+                self.branches_text = branches_text
+                self.config.branches.inner = read_branches(self.root_dir).inner
+                for node in iter_nodes(self.root):
+                    node.invalidate()
+
+        reread = False
+        collections = plan.collections
+        if collections is None or collections:
+            self.preprocess(collections)
+            reread = True
+
+        modified = []
+        collection_dirs = set(join(self.content_dir, name) for name in self.records)
+        for fpath in plan.changed[CONTENT]:
+            ## as in reading, collections in memory are not read from their files
+            if basename(fpath) != 'index.md' and dirname(fpath) in collection_dirs:
+                continue
+            ## classified as content, so the path is inside the content directory
+            source_path = fpath[len(self.content_dir):]
+            if source_path in self.nodes and isfile(fpath):
+                modified.append((self.nodes[source_path], fpath, source_path))
+            else:
+                reread = True
+
+        if reread:
+            self.read()
+        else:
+            for node, fpath, source_path in modified:
+                node.setContent(source_path, *parse_file(fpath, convert=False))
+            if modified:
+                reorder_children(self.root)
+
+        assets = self.copy_assets(plan.changed[ASSET])
+
+        pages = self.render() if plan.needs_render else []
+        return ([PurePath(page).as_posix() for page in pages],
+                [PurePath('assets', asset).as_posix() for asset in assets])
+
+    def preprocess(self, collections: Optional[Set[str]] = None) -> None:
+        """Preprocess the data of some or all collections again.
+
+        Args:
+            collections: Names of the collections, None for all.
+        """
+        records = preprocess(self.root_dir, self.config, collections)
+        if collections is None:
+            self.records = records
+            return
+        for name in collections:
+            self.records.pop(name, None)
+        self.records.update(records)
+
+    def copy_assets(self, fpaths: Iterable[str]) -> List[str]:
+        """Copy changed asset files to the dist directory.
+
+        Project assets take precedence over theme assets of the same name,
+        as in a full build. Assets that were deleted from both are removed.
+
+        Args:
+            fpaths: Absolute paths of changed files in either assets directory.
+
+        Returns:
+            Paths of the assets copied or removed, relative to the assets
+            directory.
+        """
+        dist_assets_dir = join(self.root_dir, 'dist', 'assets')
+        sources = source_dirs(self.root_dir)
+        changed = []
+        for fpath in fpaths:
+            for source_dir in sources:
+                if fpath.startswith(source_dir + sep):
+                    rel_path = relpath(fpath, source_dir)
+                    break
+            else:
+                continue
+            sync_asset(rel_path, sources, dist_assets_dir, self.config.link_assets)
+            changed.append(rel_path)
+        return sorted(changed)
@@ -1,51 +1,104 @@
 """Development server module for Syrinx with file watching and live reload.
 
 This module provides a development server that watches for file changes in the
-parent directory hierarchy and automatically rebuilds the site when changes are
+project directory and automatically rebuilds the site when changes are
 detected. It includes an HTTP server to serve the built files.
 """
 
 import os
+import threading
 from os.path import abspath
-from socketserver import TCPServer
+from http.server import ThreadingHTTPServer
 from watchdog.observers import Observer
 from syrinx.server.hot_reload_handler import HotReloadHandler
 from syrinx.server.rebuild_handler import RebuildHandler
 
+## number of reloads to remember the changes of, for clients that missed some
+MAX_RELOADS_KEPT = 100
+
 
 class DevServer:
     """Development server with file watching and HTTP serving.
     
     Provides a complete development environment for Syrinx projects by:
-    - Watching parent directories for file changes
+    - Watching the project directory for file changes
     - Automatically rebuilding on changes
-    - Serving the built files via HTTP
+    - Serving the built files via HTTP, handling each connection
+      on its own thread
     
     Attributes:
         root_dir: The absolute path to the Syrinx project root.
         port: The port number for the HTTP server.
         args: Command-line arguments for configuration.
         reload_version: Version counter for triggering reloads.
+        reloads: Pages and assets changed by recent reloads, by version.
+        reload_condition: Notifies waiting event streams of new reloads.
     """
     def __init__(self, args):
         self.root_dir = abspath(args.dir)
         self.port = args.port
         self.args = args
         self.reload_version = 0
+        self.reloads = dict()
+        self.reload_condition = threading.Condition()
         
-    def trigger_reload(self):
-        """Increment reload version to trigger browser reloads."""
-        self.reload_version += 1
+    def trigger_reload(self, pages=None, assets=()):
+        """Increment reload version to trigger browser reloads.
+
+        Args:
+            pages: Paths of the pages that changed, relative to the dist
+                directory, or None if any page may have changed.
+            assets: Paths of the assets that changed, relative to the
+                dist directory.
+        """
+        with self.reload_condition:
+            self.reload_version += 1
+            self.reloads[self.reload_version] = (pages, list(assets))
+            self.reloads.pop(self.reload_version - MAX_RELOADS_KEPT, None)
+            self.reload_condition.notify_all()
+
+    def wait_for_reload(self, version, timeout):
+        """Wait for a reload after the given version.
+
+        Args:
+            version: The last reload version the client knows of.
+            timeout: Maximum number of seconds to wait.
+
+        Returns:
+            Dictionary with the current version and the pages and assets
+            changed since the given version, or None on timeout. Pages is
+            None if any page may have changed, which is also the case for
+            versions ahead of the server, seen before it was restarted.
+        """
+        with self.reload_condition:
+            if version > self.reload_version:
+                return dict(version=self.reload_version, pages=None, assets=[])
+            if not self.reload_condition.wait_for(
+                    lambda: self.reload_version > version, timeout):
+                return None
+            pages, assets = set(), set()
+            for v in range(version + 1, self.reload_version + 1):
+                if v not in self.reloads or self.reloads[v][0] is None:
+                    pages = None
+                elif pages is not None:
+                    pages.update(self.reloads[v][0])
+                if v in self.reloads:
+                    assets.update(self.reloads[v][1])
+            return dict(
+                version=self.reload_version,
+                pages=None if pages is None else sorted(pages),
+                assets=sorted(assets),
+            )
         
     def start(self):
         """Start the development server.
         
-        Performs an initial build, sets up file watching on the parent
+        Performs an initial build, sets up file watching on the project
         directory, and starts an HTTP server to serve the dist directory.
         The server runs until interrupted with Ctrl+C.
         """
-        # Determine parent directory to watch
-        watch_dir = os.path.dirname(self.root_dir)
+        # Only the project itself affects the build
+        watch_dir = self.root_dir
         print(f"[DEV] Watching for changes in: {watch_dir}")
         print(f"[DEV] Building from: {self.root_dir}")
         
@@ -56,7 +109,8 @@ class DevServer:
         print("[DEV] Initial build...")
         event_handler.rebuild()
         
-        # Setup file watcher
+        # Setup file watcher, with builds on a background thread
+        event_handler.start()
         observer = Observer()
         observer.schedule(event_handler, watch_dir, recursive=True)
         observer.start()
@@ -71,7 +125,7 @@ class DevServer:
         HotReloadHandler.initialize(self, dist_dir)
         
         try:
-            with TCPServer(("", self.port), HotReloadHandler) as httpd:
+            with ThreadingHTTPServer(("", self.port), HotReloadHandler) as httpd:
                 print(f"\n[DEV] Server running at http://localhost:{self.port}")
                 print("[DEV] Press Ctrl+C to stop\n")
                 httpd.serve_forever()
@@ -80,4 +134,5 @@ class DevServer:
             observer.stop()
         finally:
             observer.join()
+            event_handler.stop()
             os.chdir(original_dir)
@@ -1,35 +1,54 @@
 """HTTP handler for development server with live reload functionality."""
 from __future__ import annotations
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
 import os
 import json
+import threading
+from hashlib import blake2b
 from http.server import SimpleHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
 if TYPE_CHECKING:
     from syrinx.server.dev_server import DevServer
 
+## seconds between comments sent on idle event streams, to detect closed tabs
+HEARTBEAT_INTERVAL = 15
+
 
 class HotReloadHandler(SimpleHTTPRequestHandler):
     """Custom HTTP handler that injects live reload script into HTML pages.
     
     This handler serves files from a specified directory and automatically
     injects a live reload script into HTML pages to enable automatic page
-    refreshes during development.
+    refreshes during development. The script listens for reloads on a
+    server-sent event stream, and only reloads if its page changed.
+
+    Connections are kept alive between requests (HTTP/1.1), so every
+    response with a body has a Content-Length.
+
+    Pages are kept in memory with the script injected, already encoded,
+    until the next rebuild. Each page has an ETag, so browsers that
+    already have the current version get a 304 Not Modified response.
     
     Attributes:
         dev_server: Reference to the DevServer instance for reload version.
         dist_dir: Directory to serve files from.
         reload_script_content: JavaScript content for live reload functionality.
+        page_cache: Reload version, ETag and body of served pages, by file path.
+        page_cache_lock: Guards the page cache across request threads.
     """
     
+    protocol_version = 'HTTP/1.1'
     dev_server: DevServer
     dist_dir: str
     reload_script_content: str
+    page_cache: Dict[str, Tuple[int, str, bytes]]
+    page_cache_lock: threading.Lock
     
     @classmethod
     def initialize(cls, dev_server: DevServer, dist_dir: str):
         """Initialize class-level properties before server starts.
         
-        This method must be called before the TCPServer starts accepting
+        This method must be called before the server starts accepting
         requests to ensure all class properties are properly initialized.
         
         Args:
@@ -38,6 +57,8 @@ class HotReloadHandler(SimpleHTTPRequestHandler):
         """
         cls.dev_server = dev_server
         cls.dist_dir = dist_dir
+        cls.page_cache = dict()
+        cls.page_cache_lock = threading.Lock()
         
         # Load reload script once during class initialization
         reload_js_path = os.path.join(os.path.dirname(__file__), 'reload_outdated.js')
@@ -46,42 +67,120 @@ class HotReloadHandler(SimpleHTTPRequestHandler):
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, directory=self.dist_dir, **kwargs)
+
+    def page_path(self) -> Optional[str]:
+        """File path of the requested HTML page, None for other files."""
+        url_path = urlsplit(self.path).path
+        if url_path.endswith('/'):
+            return os.path.join(self.translate_path(url_path), 'index.html')
+        if url_path.endswith('.html'):
+            return self.translate_path(url_path)
+        return None
+
+    def injected_page(self, file_path: str) -> Optional[Tuple[str, bytes]]:
+        """ETag and encoded contents of a page with the reload script injected.
+
+        Pages are read from disk once per rebuild, after that they are
+        served from the cache.
+
+        Args:
+            file_path: Path of the HTML file in the dist directory.
+
+        Returns:
+            Tuple of ETag and body, or None if the file does not exist.
+        """
+        version = self.dev_server.reload_version
+        with self.page_cache_lock:
+            cached = self.page_cache.get(file_path)
+        if cached is not None and cached[0] == version:
+            return cached[1], cached[2]
+        if not os.path.isfile(file_path):
+            return None
+
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+
+        # Use cached reload script and replace version placeholder
+        reload_script_content = self.reload_script_content.replace(
+            '__CURRENT_VERSION__', 
+            str(version)
+        )
+
+        reload_script = f'<script>\n{reload_script_content}\n</script>\n</body>'
+        body = content.replace('</body>', reload_script).encode()
+        etag = f'"{version}-{blake2b(body, digest_size=8).hexdigest()}"'
+        with self.page_cache_lock:
+            self.page_cache[file_path] = (version, etag, body)
+        return etag, body
         
+    def stream_events(self):
+        """Send reloads as server-sent events until the client disconnects.
+
+        Each event has the new reload version and the pages and assets
+        that changed since the version the client last saw.
+        """
+        query = parse_qs(urlsplit(self.path).query)
+        try:
+            version = int(self.headers.get('Last-Event-ID') or query['version'][0])
+        except (KeyError, ValueError):
+            version = self.dev_server.reload_version
+
+        # The stream ends when the connection closes
+        self.close_connection = True
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        try:
+            while True:
+                change = self.dev_server.wait_for_reload(version, HEARTBEAT_INTERVAL)
+                if change is None:
+                    self.wfile.write(b': heartbeat\n\n')
+                else:
+                    version = change['version']
+                    self.wfile.write(f'id: {version}\ndata: {json.dumps(change)}\n\n'.encode())
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            return
+
     def do_GET(self):
         """Handle GET requests with reload script injection for HTML files."""
-        # Handle reload check endpoint
+        # Handle reload event stream
+        if urlsplit(self.path).path == '/__dev_events__':
+            self.stream_events()
+            return
+
+        # Handle reload check endpoint, for browsers without event streams
         if self.path == '/__dev_reload_check__':
+            body = json.dumps({'version': self.dev_server.reload_version}).encode()
             self.send_response(200)
             self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
             self.send_header('Cache-Control', 'no-cache')
             self.end_headers()
-            self.wfile.write(json.dumps({'version': self.dev_server.reload_version}).encode())
+            self.wfile.write(body)
             return
             
         # For HTML files, inject reload script
-        if self.path.endswith('.html') or self.path == '/':
-            file_path = os.path.join(self.dist_dir, self.path.lstrip('/'))
-            if self.path == '/':
-                file_path = os.path.join(self.dist_dir, 'index.html')
-                
-            if os.path.exists(file_path):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                # Use cached reload script and replace version placeholder
-                reload_script_content = self.reload_script_content.replace(
-                    '__CURRENT_VERSION__', 
-                    str(self.dev_server.reload_version)
-                )
-                
-                reload_script = f'<script>\n{reload_script_content}\n</script>\n</body>'
-                content = content.replace('</body>', reload_script)
-                
+        file_path = self.page_path()
+        if file_path is not None:
+            page = self.injected_page(file_path)
+            if page is not None:
+                etag, body = page
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+
                 self.send_response(200)
-                self.send_header('Content-Type', 'text/html')
-                self.send_header('Content-Length', str(len(content.encode())))
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('Cache-Control', 'no-cache')
+                self.send_header('ETag', etag)
                 self.end_headers()
-                self.wfile.write(content.encode())
+                self.wfile.write(body)
                 return
         
         # Default behavior for other files
@@ -1,76 +1,143 @@
 """File system event handler for automatic rebuilds."""
 
 import time
-from pathlib import Path
-from watchdog.events import FileSystemEventHandler
-from syrinx.run import run_pipeline
+import threading
+from watchdog.events import (
+    FileSystemEventHandler,
+    EVENT_TYPE_CREATED,
+    EVENT_TYPE_DELETED,
+    EVENT_TYPE_MODIFIED,
+    EVENT_TYPE_MOVED,
+)
+from syrinx.server.build_session import BuildSession
+from syrinx.server.rebuild_plan import RebuildPlan
+
+## events that change files, as opposed to merely opening or reading them
+CHANGE_EVENTS = (EVENT_TYPE_CREATED, EVENT_TYPE_DELETED, EVENT_TYPE_MODIFIED, EVENT_TYPE_MOVED)
+
+DEFAULT_QUIET_WINDOW = 0.3  # seconds
 
 
 class RebuildHandler(FileSystemEventHandler):
     """File system event handler that triggers rebuilds on file changes.
     
     This handler watches for file system events and triggers a rebuild of the
-    Syrinx site when relevant files are modified. It includes debouncing to
-    avoid excessive rebuilds and filters out irrelevant changes.
+    Syrinx site when relevant files are modified. Each changed file is
+    classified, so that only the work it requires is done, and files
+    outside the project, in the dist directory or otherwise unrelated to
+    the build are ignored.
+
+    Builds run on a background thread, so the observer thread is never
+    blocked. Changes are collected until no new ones arrive for the quiet
+    window, then built together. Changes that arrive during a build are
+    built right after it.
     
     Attributes:
         root_dir: The root directory of the Syrinx project to build.
-        watch_dir: The parent directory to watch for changes.
+        watch_dir: The directory to watch for changes.
         args: Command-line arguments for configuration.
-        last_build_time: Timestamp of the last build to implement debouncing.
-        build_delay: Minimum delay between builds in seconds.
-        reload_callback: Callback function to trigger browser reload.
+        session: Build state kept between rebuilds.
+        quiet_window: Seconds without changes to wait for before building.
+        pending: Changes not yet built.
+        last_event_time: Time of the last change, on the monotonic clock.
+        reload_callback: Callback function to trigger browser reload,
+            with the pages and assets that changed.
     """
     def __init__(self, root_dir, watch_dir, reload_callback, args):
         self.root_dir = root_dir
         self.watch_dir = watch_dir
         self.args = args
-        self.last_build_time = 0
-        self.build_delay = 0.5  # seconds
+        self.session = BuildSession(args)
+        self.quiet_window = getattr(args, 'quiet_window', DEFAULT_QUIET_WINDOW)
+        self.pending = RebuildPlan(root_dir)
+        self.last_event_time = 0
         self.reload_callback = reload_callback
+        self.changes = threading.Condition()
+        self.stopped = False
+        self.builder = threading.Thread(target=self.run_builds, daemon=True)
+
+    def start(self):
+        """Start building changes on the background thread."""
+        self.builder.start()
+
+    def stop(self):
+        """Stop the background thread after the build in progress."""
+        with self.changes:
+            self.stopped = True
+            self.changes.notify()
+        if self.builder.is_alive():
+            self.builder.join()
         
     def on_any_event(self, event):
-        """Handle any file system event by rebuilding if necessary.
+        """Queue the changed files of a file system event for the next build.
         
         Args:
             event: A watchdog FileSystemEvent object containing information
                 about the file system change.
         """
-        if event.is_directory:
-            return
-            
-        # Ignore dist directory changes to avoid infinite loops
-        if 'dist' in event.src_path:
-            return
-            
-        # Ignore hidden files and common editor temp files
-        if any(part.startswith('.') for part in Path(event.src_path).parts):
-            return
-            
-        # Ignore Python cache files
-        if '__pycache__' in event.src_path or event.src_path.endswith('.pyc'):
+        if event.is_directory or event.event_type not in CHANGE_EVENTS:
             return
-            
-        current_time = time.time()
-        if current_time - self.last_build_time > self.build_delay:
-            self.last_build_time = current_time
-            print(f"\n[DEV] File changed: {event.src_path}")
-            self.rebuild()
+
+        fpaths = [event.src_path]
+        if event.event_type == EVENT_TYPE_MOVED:
+            fpaths.append(event.dest_path)
+
+        with self.changes:
+            if any([self.pending.add(fpath) for fpath in fpaths]):
+                self.last_event_time = time.monotonic()
+                self.changes.notify()
+
+    def next_plan(self):
+        """Wait until changes are pending and the quiet window has passed.
+
+        Returns:
+            The RebuildPlan of the pending changes, or None when stopped.
+        """
+        with self.changes:
+            while not self.pending and not self.stopped:
+                self.changes.wait()
+            while not self.stopped:
+                remaining = self.last_event_time + self.quiet_window - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.changes.wait(remaining)
+            if self.stopped:
+                return None
+            plan, self.pending = self.pending, RebuildPlan(self.root_dir)
+            return plan
+
+    def run_builds(self):
+        """Build pending changes until stopped, on the background thread."""
+        while True:
+            plan = self.next_plan()
+            if plan is None:
+                return
+            n_files = sum(len(fpaths) for fpaths in plan.changed.values())
+            print(f"\n[DEV] Files changed: {n_files}")
+            self.rebuild(plan)
     
-    def rebuild(self):
+    def rebuild(self, plan=None):
         """Rebuild the Syrinx site.
         
-        Runs the full build pipeline including preprocessing, reading,
-        and building. Catches and prints any errors that occur during
-        the build process.
+        Without a plan, runs the full build pipeline including
+        preprocessing, reading, and building. Otherwise only does the work
+        the changed files require. Catches and prints any errors that
+        occur during the build process.
+
+        Args:
+            plan: RebuildPlan with the files that changed, if known.
         """
         try:
             print("[DEV] Rebuilding...")
-            run_pipeline(self.args)
+            if plan is None:
+                self.session.build_all()
+                pages, assets = None, []
+            else:
+                pages, assets = self.session.apply(plan)
             print("[DEV] Build complete!")
             
-            # Trigger browser reload if callback is set
+            # Trigger browser reload of the changed pages if callback is set
             if self.reload_callback:
-                self.reload_callback()
+                self.reload_callback(pages, assets)
         except Exception as e:
             print(f"[DEV] Build error: {e}")
@@ -0,0 +1,109 @@
+"""Classification of changed files, to plan the work a rebuild needs."""
+from __future__ import annotations
+from typing import Dict, Iterable, Optional, Set
+from os.path import basename, relpath, sep
+from pathlib import PurePath
+from syrinx.preprocess import find_reader
+
+CONTENT = 'content'
+DATA = 'data'
+ARCHETYPE = 'archetype'
+TEMPLATE = 'template'
+ASSET = 'asset'
+CONFIG = 'config'
+BRANCHES = 'branches'
+UNRELATED = 'unrelated'
+
+KINDS = (CONTENT, DATA, ARCHETYPE, TEMPLATE, ASSET, CONFIG, BRANCHES)
+
+## changes of these kinds affect the rendered pages
+RENDERED = (CONTENT, DATA, ARCHETYPE, TEMPLATE, BRANCHES)
+
+
+def classify(fpath: str, root_dir: str) -> str:
+    """Kind of project file that the path points to.
+
+    Files outside the project, in the dist directory, hidden files and
+    python caches are unrelated to the build.
+
+    Args:
+        fpath: Absolute path of the changed file.
+        root_dir: The absolute path to the Syrinx project root.
+
+    Returns:
+        One of the KINDS, or UNRELATED.
+    """
+    rel_path = relpath(fpath, root_dir)
+    parts = PurePath(rel_path).parts
+    if not parts or parts[0] == '..' or parts[0] == 'dist':
+        return UNRELATED
+    if any(part.startswith('.') or part == '__pycache__' for part in parts):
+        return UNRELATED
+    if rel_path == 'syrinx.cfg':
+        return CONFIG
+    if rel_path == 'branches.toml':
+        return BRANCHES
+    if parts[0] == 'content' and rel_path.endswith('.md'):
+        return CONTENT
+    if parts[0] == 'data' and len(parts) > 1:
+        return DATA
+    if parts[0] == 'archetypes' and rel_path.endswith('.md'):
+        return ARCHETYPE
+    if rel_path.startswith(join_parts('theme', 'templates')):
+        return TEMPLATE
+    if rel_path.startswith((join_parts('theme', 'assets'), join_parts('assets'))):
+        return ASSET
+    return UNRELATED
+
+
+def join_parts(*parts: str) -> str:
+    return sep.join(parts) + sep
+
+
+class RebuildPlan:
+    """Changed files of a project grouped by kind.
+
+    Determines the least work needed to bring the built site up to date,
+    for instance copying one asset or preprocessing one data collection.
+
+    Attributes:
+        root_dir: The absolute path to the Syrinx project root.
+        changed: Absolute paths of the changed files, by kind.
+    """
+
+    def __init__(self, root_dir: str, fpaths: Iterable[str] = ()) -> None:
+        self.root_dir = root_dir
+        self.changed: Dict[str, Set[str]] = dict((kind, set()) for kind in KINDS)
+        for fpath in fpaths:
+            self.add(fpath)
+
+    def add(self, fpath: str) -> bool:
+        """Add a changed file to the plan.
+
+        Returns:
+            Whether the file is related to the build.
+        """
+        kind = classify(fpath, self.root_dir)
+        if kind == UNRELATED:
+            return False
+        self.changed[kind].add(fpath)
+        return True
+
+    def __bool__(self) -> bool:
+        return any(self.changed.values())
+
+    @property
+    def collections(self) -> Optional[Set[str]]:
+        """Names of the data collections to preprocess again.
+
+        None means all collections, for changes to other files in the
+        data directory, such as a SQLite database.
+        """
+        if any(find_reader(basename(fpath)) is None for fpath in self.changed[DATA]):
+            return None
+        fpaths = self.changed[DATA] | self.changed[ARCHETYPE]
+        return set(basename(fpath).split('.')[0] for fpath in fpaths)
+
+    @property
+    def needs_render(self) -> bool:
+        return any(self.changed[kind] for kind in RENDERED)
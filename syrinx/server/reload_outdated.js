@@ -1,11 +1,107 @@
 /**
  * Development mode live reload script for Syrinx.
  * 
- * This script checks for version changes on the server and automatically
- * reloads the page when changes are detected.
+ * This script listens for rebuilds on the server's event stream and
+ * reloads the page when it changed. Changed stylesheets linked from the
+ * page and images shown by it are swapped in place instead, keeping the
+ * scroll position and page state.
+ * Browsers without event streams check for version changes every second
+ * instead.
  */
 (function() {
     let currentVersion = __CURRENT_VERSION__;
+
+    // Files in the dist directory that this page may have been served from,
+    // leaf pages are written as <name>/<name>.html
+    function pageFiles() {
+        const path = decodeURIComponent(window.location.pathname).replace(/^\//, '');
+        const base = path.replace(/(\.html|\/)$/, '');
+        const name = base.split('/').pop();
+        const files = [path, base + '.html', base + '/index.html', base + '/' + name + '.html'];
+        return base === '' ? ['index.html'] : files;
+    }
+
+    function isAffected(change) {
+        if (change.pages === null) {
+            return true;
+        }
+        return pageFiles().some((file) => change.pages.includes(file));
+    }
+
+    const STYLESHEET = /\.css$/i;
+    const IMAGE = /\.(png|jpe?g|gif|svg|webp|avif|ico)$/i;
+
+    // Path of a URL on this server, to compare with changed assets
+    function localPath(url) {
+        const parsed = new URL(url, window.location.href);
+        if (parsed.origin !== window.location.origin) {
+            return null;
+        }
+        return decodeURIComponent(parsed.pathname).replace(/^\//, '');
+    }
+
+    function bustCache(url) {
+        const parsed = new URL(url, window.location.href);
+        parsed.searchParams.set('__dev_version__', currentVersion);
+        return parsed.href;
+    }
+
+    // Load the new stylesheet before removing the old one, to avoid a flash
+    // of unstyled content
+    function swapStylesheet(link) {
+        const clone = link.cloneNode();
+        clone.href = bustCache(link.href);
+        clone.onload = clone.onerror = () => link.remove();
+        link.after(clone);
+    }
+
+    // Paths of the image candidates in a srcset attribute
+    function srcsetPaths(srcset) {
+        return srcset.split(',').map((candidate) => candidate.trim().split(/\s+/)[0])
+            .filter((url) => url).map(localPath);
+    }
+
+    // Swap changed stylesheets and images in place. Only stylesheets
+    // linked from the page and images in the src of its img elements can
+    // be swapped. Stylesheets imported by others and images used in them
+    // or in a srcset would keep their cached URL, so those reload the page,
+    // as do other kinds of assets. Returns false if the page has to be
+    // reloaded.
+    function swapAssets(assets) {
+        const links = Array.from(document.querySelectorAll('link[rel~="stylesheet"][href]'))
+            .filter((link) => assets.includes(localPath(link.href)));
+        const images = Array.from(document.images)
+            .filter((img) => img.src && assets.includes(localPath(img.src)));
+        const inSrcset = Array.from(document.querySelectorAll('img[srcset], source[srcset]'))
+            .some((el) => srcsetPaths(el.srcset).some((path) => assets.includes(path)));
+        const swappable = (asset) =>
+            STYLESHEET.test(asset) ? links.some((link) => localPath(link.href) === asset)
+            : IMAGE.test(asset) ? images.some((img) => localPath(img.src) === asset)
+            : false;
+        if (inSrcset || !assets.every(swappable)) {
+            return false;
+        }
+        links.forEach(swapStylesheet);
+        images.forEach((img) => { img.src = bustCache(img.src); });
+        if (assets.length > 0) {
+            console.log('[DEV] Swapped', assets.join(', '));
+        }
+        return true;
+    }
+
+    if (window.EventSource) {
+        const source = new EventSource('/__dev_events__?version=' + currentVersion);
+        source.onmessage = (event) => {
+            const change = JSON.parse(event.data);
+            currentVersion = change.version;
+            if (isAffected(change) || !swapAssets(change.assets)) {
+                console.log('[DEV] Reloading page...');
+                window.location.reload();
+            }
+        };
+        return;
+    }
+
     setInterval(async () => {
         try {
             const response = await fetch('/__dev_reload_check__');
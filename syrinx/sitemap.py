@@ -1,32 +1,121 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING, List, Tuple, Optional
+from typing import TYPE_CHECKING, List, Tuple, Optional, Iterator, Iterable, TextIO
+from os.path import join
+from os import remove, rename
+from glob import glob
+from xml.sax.saxutils import escape
+import gzip
 if TYPE_CHECKING:
     from syrinx.node import ContentNode
     from datetime import datetime
     ListOfUrls = List[Tuple[str, Optional[datetime]]]
 
+## limits per sitemap file set by the sitemaps.org protocol
+MAX_URLS = 50_000
+MAX_BYTES = 50 * 2**20
 
-def collect_urls(node: ContentNode) -> ListOfUrls:
-    urls = []
+HEADER = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+          '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+FOOTER = '</urlset>'
+
+
+def iter_urls(node: ContentNode) -> Iterator[Tuple[str, Optional[datetime]]]:
+    """Canonical url and last modified datetime of each node to be
+    included in the sitemap, depth-first with leaves before branches.
+    """
     if node.includeInSitemap and node.address:
-        urls.append((node.address, node.lastModified))
+        yield (node.address, node.lastModified)
 
     for leaf in node.leaves:
-        urls += collect_urls(leaf)
+        yield from iter_urls(leaf)
 
     for branch in node.branches:
-        urls += collect_urls(branch)
+        yield from iter_urls(branch)
 
-    return urls
+
+def collect_urls(node: ContentNode) -> ListOfUrls:
+    return list(iter_urls(node))
+
+
+def url_entry(url: str, dt: Optional[datetime]) -> str:
+    lm = f'<lastmod>{dt.date().isoformat()}</lastmod>' if dt else ''
+    return f'    <url><loc>{escape(url)}</loc>{lm}</url>\n'
 
 
 def generate_sitemap(urls: ListOfUrls) -> str:
     """Sitemap content string from list of url, datetime tuples
     """
-    s = '<?xml version="1.0" encoding="UTF-8"?>\n'
-    s += '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    return HEADER + ''.join(url_entry(url, dt) for (url, dt) in urls) + FOOTER
+
+
+def open_sitemap(fpath: str, compress: bool) -> TextIO:
+    if compress:
+        return gzip.open(fpath, 'wt', encoding='utf-8')
+    return open(fpath, 'w', encoding='utf-8')
+
+
+def write_sitemap(
+        urls: Iterable[Tuple[str, Optional[datetime]]],
+        dist_dir: str,
+        base_url: str,
+        compress: bool = False,
+        max_urls: int = MAX_URLS,
+        max_bytes: int = MAX_BYTES
+    ) -> List[str]:
+    """Stream urls into sitemap files in the dist directory
+
+    If all urls fit in one file it is called `sitemap.xml`. Otherwise
+    they are split over `sitemap-1.xml`, `sitemap-2.xml` etc.,
+    listed in `sitemap_index.xml`. Sitemap files from a previous build
+    are removed first.
+
+    Args:
+        urls: Iterable of url, datetime tuples
+        dist_dir: Directory to write to
+        base_url: Url of the site, used for the sitemap locations in the index
+        compress: Whether to gzip the sitemap files
+        max_urls: Maximum number of urls per file
+        max_bytes: Maximum uncompressed size per file
+
+    Returns:
+        List[str]: Names of the files written
+    """
+    for stale_fname in glob('sitemap*.xml*', root_dir=dist_dir):
+        remove(join(dist_dir, stale_fname))
+
+    ext = '.xml.gz' if compress else '.xml'
+    fnames: List[str] = []
+    fhandle: Optional[TextIO] = None
+    n_urls, n_bytes = 0, 0
     for (url, dt) in urls:
-        lm = f'<lastmod>{dt.date().isoformat()}</lastmod>' if dt else ''
-        s += f'    <url><loc>{url}</loc>{lm}</url>\n'
-    s += '</urlset>'
-    return s
+        entry = url_entry(url, dt)
+        size = len(entry.encode())
+        if fhandle is not None:
+            if n_urls == max_urls or n_bytes + size + len(FOOTER) > max_bytes:
+                fhandle.write(FOOTER)
+                fhandle.close()
+                fhandle = None
+        if fhandle is None:
+            fnames.append(f'sitemap-{len(fnames)+1}{ext}')
+            fhandle = open_sitemap(join(dist_dir, fnames[-1]), compress)
+            fhandle.write(HEADER)
+            n_urls, n_bytes = 0, len(HEADER.encode())
+        fhandle.write(entry)
+        n_urls += 1
+        n_bytes += size
+    if fhandle is not None:
+        fhandle.write(FOOTER)
+        fhandle.close()
+
+    if len(fnames) == 1:
+        rename(join(dist_dir, fnames[0]), join(dist_dir, f'sitemap{ext}'))
+        fnames = [f'sitemap{ext}']
+    elif fnames:
+        with open(join(dist_dir, 'sitemap_index.xml'), 'w', encoding='utf-8') as fhandle:
+            fhandle.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+            fhandle.write('<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+            for fname in fnames:
+                fhandle.write(f'    <sitemap><loc>{escape(base_url)}/{fname}</loc></sitemap>\n')
+            fhandle.write('</sitemapindex>')
+        fnames.append('sitemap_index.xml')
+    return fnames
@@ -0,0 +1,65 @@
+from __future__ import annotations
+from unittest import TestCase
+from os.path import join, isdir, getmtime, dirname
+from os import makedirs, utime, stat, remove
+import tempfile
+
+
+class AssetsTests(TestCase):
+
+    def write(self, fpath: str, content: str):
+        makedirs(dirname(fpath), exist_ok=True)
+        with open(fpath, 'w') as fhandle:
+            fhandle.write(content)
+
+    def read(self, fpath: str) -> str:
+        with open(fpath) as fhandle:
+            return fhandle.read()
+
+    def test_sync_only_changed(self):
+        """Only new and changed assets are copied, project assets take
+        precedence, and deleted assets are removed
+        """
+        from syrinx.assets import sync_assets, source_dirs
+        with tempfile.TemporaryDirectory() as root_dir:
+            target_dir = join(root_dir, 'dist', 'assets')
+            self.write(join(root_dir, 'theme', 'assets', 'css', 'a.css'), 'theme')
+            self.write(join(root_dir, 'theme', 'assets', 'b.css'), 'theme')
+            self.write(join(root_dir, 'assets', 'css', 'a.css'), 'project')
+            self.write(join(root_dir, 'assets', 'img', 'c.png'), 'c')
+            copied, removed = sync_assets(source_dirs(root_dir), target_dir)
+            self.assertEqual(copied, ['b.css', join('css', 'a.css'), join('img', 'c.png')])
+            self.assertEqual(removed, [])
+            self.assertEqual(self.read(join(target_dir, 'css', 'a.css')), 'project')
+
+            utime(join(target_dir, 'b.css'), (0, 0))
+            utime(join(root_dir, 'theme', 'assets', 'b.css'), (0, 0))
+            self.write(join(root_dir, 'assets', 'css', 'a.css'), 'changed')
+            utime(join(root_dir, 'assets', 'css', 'a.css'), (5, 5))
+            remove(join(root_dir, 'assets', 'img', 'c.png'))
+            copied, removed = sync_assets(source_dirs(root_dir), target_dir)
+            self.assertEqual(copied, [join('css', 'a.css')])
+            self.assertEqual(removed, [join('img', 'c.png')])
+            self.assertEqual(self.read(join(target_dir, 'css', 'a.css')), 'changed')
+            self.assertEqual(getmtime(join(target_dir, 'css', 'a.css')), 5)
+            self.assertFalse(isdir(join(target_dir, 'img')))
+
+    def test_sync_links(self):
+        """Assets can be hard linked, and replacing a link leaves the
+        file it was linked to alone
+        """
+        from syrinx.assets import sync_assets, sync_asset
+        with tempfile.TemporaryDirectory() as root_dir:
+            theme_dir = join(root_dir, 'theme')
+            project_dir = join(root_dir, 'project')
+            target_dir = join(root_dir, 'dist')
+            self.write(join(theme_dir, 'a.css'), 'theme')
+            sync_assets([project_dir, theme_dir], target_dir, link=True)
+            self.assertEqual(stat(join(target_dir, 'a.css')).st_ino,
+                             stat(join(theme_dir, 'a.css')).st_ino)
+            self.assertEqual(sync_assets([project_dir, theme_dir], target_dir, link=True), ([], []))
+
+            self.write(join(project_dir, 'a.css'), 'project')
+            sync_asset('a.css', [project_dir, theme_dir], target_dir)
+            self.assertEqual(self.read(join(target_dir, 'a.css')), 'project')
+            self.assertEqual(self.read(join(theme_dir, 'a.css')), 'theme')
@@ -77,3 +77,69 @@ class BuildTests(TestCase):
         isfile.side_effect = lambda p: False
         with self.assertRaisesRegex(ThemeError, 'Missing template for "foo"'):
             choose_template_file(node, isfile, '/t')
+
+    def test_template_index(self):
+        """Templates are chosen from a single listing of the directory,
+        and loaded once for all nodes using them
+        """
+        from syrinx.build import TemplateIndex
+        import tempfile
+        from os.path import join
+        with tempfile.TemporaryDirectory() as template_dir:
+            for fname in ['page.jinja2', 'leaf.jinja2', 'about.jinja2']:
+                with open(join(template_dir, fname), 'w') as fhandle:
+                    fhandle.write('')
+            env = Mock()
+            index = TemplateIndex(template_dir, env)
+        nodes = [Mock(isLeaf=True), Mock(isLeaf=True), Mock(isLeaf=False), Mock(isLeaf=False)]
+        for node, name in zip(nodes, ['a', 'b', 'about', 'c']):
+            node.name = name
+        self.assertEqual([index.choose(n) for n in nodes],
+            ['leaf.jinja2', 'leaf.jinja2', 'about.jinja2', 'page.jinja2'])
+        for node in nodes:
+            index.get(node)
+        self.assertEqual(env.get_template.call_count, 3)
+
+    def test_parallel_same_as_serial(self):
+        """Rendering with worker processes writes the same pages and
+        manifest as rendering in the main process
+        """
+        from syrinx.run import run_pipeline
+        from argparse import Namespace
+        from os.path import join, relpath
+        from os import makedirs, walk
+        import tempfile
+
+        def build_site(root_dir: str, jobs: int):
+            makedirs(join(root_dir, 'theme', 'templates'))
+            with open(join(root_dir, 'theme', 'templates', 'page.jinja2'), 'w') as fhandle:
+                fhandle.write('{{ root.title }}|{{ index.title }}|{{ index.content_html }}'
+                              '{% for leaf in index.leaves %}|{{ leaf.title }}{% endfor %}')
+            with open(join(root_dir, 'theme', 'templates', 'leaf.jinja2'), 'w') as fhandle:
+                fhandle.write('{{ index.title }}|{{ index.content_html }}')
+            for section in ['blog', 'news']:
+                makedirs(join(root_dir, 'content', section))
+                with open(join(root_dir, 'content', section, 'index.md'), 'w') as fhandle:
+                    fhandle.write(f'+++\n+++\n# {section}')
+                for n in range(5):
+                    with open(join(root_dir, 'content', section, f'p{n}.md'), 'w') as fhandle:
+                        fhandle.write(f'+++\nSequenceNumber = {5 - n}\n+++\n# Post {n}\n\n*text*')
+            with open(join(root_dir, 'content', 'index.md'), 'w') as fhandle:
+                fhandle.write('+++\n+++\n# Home')
+            run_pipeline(Namespace(dir=root_dir, jobs=jobs, leaf_pages=True, incremental=True))
+            files = dict()
+            for dirpath, _, fnames in walk(root_dir):
+                for fname in fnames:
+                    rel_path = relpath(join(dirpath, fname), root_dir)
+                    if rel_path.startswith('dist') or fname == 'manifest.json':
+                        with open(join(root_dir, rel_path)) as fhandle:
+                            files[rel_path] = fhandle.read()
+            return files
+
+        with tempfile.TemporaryDirectory() as serial_dir:
+            serial = build_site(serial_dir, jobs=1)
+        with tempfile.TemporaryDirectory() as parallel_dir:
+            parallel = build_site(parallel_dir, jobs=2)
+        self.assertIn(join('dist', 'blog', 'p0', 'p0.html'), serial)
+        self.assertIn(join('.syrinx-cache', 'manifest.json'), serial)
+        self.assertEqual(parallel, serial)
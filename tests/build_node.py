@@ -3,20 +3,37 @@ from unittest.mock import Mock, patch
 
 class BuildNodeTests(TestCase):
 
-    @patch('syrinx.build.isfile')
     @patch('syrinx.build.open')
-    def test_follows_buildPage(self, open, isfile):
+    def test_follows_buildPage(self, open):
         from syrinx.build import build_node
         node = Mock()
         root = Mock()
-        env = Mock()
-        isfile.return_value = True
+        templates = Mock()
         node.name = 'foo'
         node.branches = []
         node.leaves = []
         node.buildPage = False
-        build_node(node, root, '', '', env)
-        self.assertFalse(env.get_template().render.called)
+        build_node(node, root, '', templates)
+        self.assertFalse(templates.get().render.called)
         node.buildPage = True
-        build_node(node, root, '', '', env)
-        self.assertTrue(env.get_template().render.called)
+        build_node(node, root, '', templates)
+        self.assertTrue(templates.get().render.called)
+
+    @patch('syrinx.build.os.makedirs')
+    @patch('syrinx.build.open')
+    def test_pending_collects_pages(self, open, makedirs):
+        """If a pending list is passed, pages are collected rather than rendered
+        """
+        from syrinx.build import build_node
+        node = Mock()
+        root = Mock()
+        templates = Mock()
+        node.name = 'foo'
+        node.isLeaf = False
+        node.branches = []
+        node.leaves = []
+        node.buildPage = True
+        pending = []
+        build_node(node, root, '/d', templates, pending=pending)
+        self.assertFalse(templates.get().render.called)
+        self.assertEqual(pending, [(node, '/d/foo/index.html')])
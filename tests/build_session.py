@@ -0,0 +1,158 @@
+from __future__ import annotations
+from unittest import TestCase
+from unittest.mock import Mock, patch
+from os.path import join
+from os import makedirs
+import tempfile
+
+
+class BuildSessionTests(TestCase):
+
+    @patch('syrinx.server.build_session.build')
+    @patch('syrinx.server.build_session.preprocess')
+    @patch('syrinx.server.build_session.configure')
+    def test_update_modified_content(self, configure, preprocess, build):
+        """A modified content file is read into its existing node, without
+        reading the other content or configuring again
+        """
+        from syrinx.server.build_session import BuildSession
+        config = Mock()
+        config.cache = False
+        config.jobs = 1
+        config.data_in_memory = False
+        configure.return_value = config
+        preprocess.return_value = dict()
+        with tempfile.TemporaryDirectory() as root_dir:
+            makedirs(join(root_dir, 'content', 'blog'))
+            for fname, content in [('index.md', 'home'), ('blog/post.md', 'old')]:
+                with open(join(root_dir, 'content', fname), 'w') as fhandle:
+                    fhandle.write(f'+++\n+++\n{content}')
+            session = BuildSession(Mock(dir=root_dir))
+            session.build_all()
+            root = session.root
+            fpath = join(root_dir, 'content', 'blog', 'post.md')
+            with open(fpath, 'w') as fhandle:
+                fhandle.write('+++\n+++\nnew')
+            with patch('syrinx.server.build_session.read') as read:
+                session.update([fpath])
+                self.assertFalse(read.called)
+        self.assertIs(session.root, root)
+        self.assertEqual(root.branches[0].leaves[0].content_md, 'new')
+        self.assertEqual(configure.call_count, 1)
+        self.assertEqual(build.call_count, 2)
+
+    @patch('syrinx.server.build_session.build')
+    def test_apply_assets(self, build):
+        """Changed assets are copied to dist, project assets taking
+        precedence over theme assets, without rendering pages
+        """
+        from syrinx.server.build_session import BuildSession
+        from syrinx.server.rebuild_plan import RebuildPlan
+        from os.path import isfile
+        with tempfile.TemporaryDirectory() as root_dir:
+            for dirname in ['assets', join('theme', 'assets'), join('dist', 'assets')]:
+                makedirs(join(root_dir, dirname))
+            for fpath, content in [('assets/a.css', 'project'), ('theme/assets/a.css', 'theme'),
+                                   ('theme/assets/b.css', 'theme'), ('dist/assets/c.css', 'old')]:
+                with open(join(root_dir, fpath), 'w') as fhandle:
+                    fhandle.write(content)
+            session = BuildSession(Mock(dir=root_dir))
+            session.root = Mock()
+            session.config = Mock(link_assets=False)
+            plan = RebuildPlan(root_dir, [join(root_dir, f) for f in
+                ['theme/assets/a.css', 'theme/assets/b.css', 'assets/c.css']])
+            self.assertEqual(session.apply(plan), ([], ['assets/a.css', 'assets/b.css', 'assets/c.css']))
+            with open(join(root_dir, 'dist', 'assets', 'a.css')) as fhandle:
+                self.assertEqual(fhandle.read(), 'project')
+            self.assertTrue(isfile(join(root_dir, 'dist', 'assets', 'b.css')))
+            self.assertFalse(isfile(join(root_dir, 'dist', 'assets', 'c.css')))
+        self.assertFalse(build.called)
+
+    def test_apply_branches(self):
+        """A changed branches file renders the pages showing its dates
+        again, while the branches file written by configuring is ignored
+        """
+        from syrinx.server.build_session import BuildSession
+        from argparse import Namespace
+        with tempfile.TemporaryDirectory() as root_dir:
+            makedirs(join(root_dir, 'content', 'bar', 'foo'))
+            makedirs(join(root_dir, 'content', 'baz'))
+            makedirs(join(root_dir, 'theme', 'templates'))
+            for fname, content in [('index.md', '+++\n+++\n'), ('bar/index.md', '+++\n+++\n'),
+                    ('baz/index.md', '+++\n+++\n'),
+                    ('bar/foo/index.md', '+++\nLastModifiedBranch = "main"\n+++\n')]:
+                with open(join(root_dir, 'content', fname), 'w') as fhandle:
+                    fhandle.write(content)
+            with open(join(root_dir, 'theme', 'templates', 'page.jinja2'), 'w') as fhandle:
+                fhandle.write('{{ index.lastModified }}')
+            fpath = join(root_dir, 'branches.toml')
+            with open(fpath, 'w') as fhandle:
+                fhandle.write('main = 2024-01-01T00:00:00\n')
+            session = BuildSession(Namespace(dir=root_dir))
+            session.build_all()
+            self.assertEqual(session.update([fpath]), ([], []))
+
+            with open(fpath, 'w') as fhandle:
+                fhandle.write('main = 2024-02-01T00:00:00\n')
+            self.assertEqual(session.update([fpath]), (['bar/foo/index.html'], []))
+            with open(join(root_dir, 'dist', 'bar', 'foo', 'index.html')) as fhandle:
+                self.assertEqual(fhandle.read(), '2024-02-01 00:00:00')
+
+    def test_update_renders_pages_reading_change(self):
+        """A changed page is rendered again with the pages that list it,
+        from a manifest in memory, as the project did not opt into
+        incremental builds
+        """
+        from syrinx.server.build_session import BuildSession
+        from syrinx.manifest import CACHE_DIRNAME
+        from argparse import Namespace
+        from os.path import isfile
+        with tempfile.TemporaryDirectory() as root_dir:
+            makedirs(join(root_dir, 'content', 'news'))
+            makedirs(join(root_dir, 'content', 'about'))
+            makedirs(join(root_dir, 'theme', 'templates'))
+            for fname in ['index.md', 'news/index.md', 'news/one.md', 'about/index.md']:
+                with open(join(root_dir, 'content', fname), 'w') as fhandle:
+                    fhandle.write('+++\n+++\nold')
+            with open(join(root_dir, 'theme', 'templates', 'page.jinja2'), 'w') as fhandle:
+                fhandle.write('{% for branch in index.branches %}{% for leaf in branch.leaves %}'
+                              '{{ leaf.content_md }}{% endfor %}{% endfor %}')
+            session = BuildSession(Namespace(dir=root_dir))
+            session.build_all()
+            fpath = join(root_dir, 'content', 'news', 'one.md')
+            with open(fpath, 'w') as fhandle:
+                fhandle.write('+++\n+++\nnew')
+            pages, _ = session.update([fpath])
+            self.assertIn('index.html', pages)
+            self.assertNotIn('about/index.html', pages)
+            with open(join(root_dir, 'dist', 'index.html')) as fhandle:
+                self.assertEqual(fhandle.read(), 'new')
+            self.assertFalse(isfile(join(root_dir, CACHE_DIRNAME, 'manifest.json')))
+
+    def test_update_ignores_files_of_collections_in_memory(self):
+        """Content files written for a collection kept in memory do not
+        replace the nodes made from its records
+        """
+        from syrinx.server.build_session import BuildSession
+        from argparse import Namespace
+        from os.path import isfile
+        with tempfile.TemporaryDirectory() as root_dir:
+            for dirname in ['archetypes', 'data', join('content', 'people'),
+                            join('theme', 'templates')]:
+                makedirs(join(root_dir, dirname))
+            for fname, content in [
+                    ('syrinx.cfg', 'data_in_memory = true\ndata_write_files = true\n'),
+                    ('archetypes/people.md', '+++\nTitle = "{{ Name }}"\n+++\n'),
+                    ('data/people.tsv', 'Id\tName\na\tAnn\n'),
+                    ('content/index.md', '+++\n+++\n'),
+                    ('content/people/index.md', '+++\n+++\n'),
+                    ('theme/templates/page.jinja2', '')]:
+                with open(join(root_dir, fname), 'w') as fhandle:
+                    fhandle.write(content)
+            session = BuildSession(Namespace(dir=root_dir))
+            session.build_all()
+            fpath = join(root_dir, 'content', 'people', 'a.md')
+            self.assertTrue(isfile(fpath))
+            session.update([fpath])
+        leaf = session.root.branches[0].leaves[0]
+        self.assertEqual(leaf.front['Name'], 'Ann')
@@ -0,0 +1,92 @@
+from __future__ import annotations
+from unittest import TestCase
+from os.path import join
+import tempfile
+
+
+class ParseCacheTests(TestCase):
+
+    def test_roundtrip(self):
+        """Parsed content can be retrieved by the hash of the file
+        contents after the cache was closed and opened again.
+        """
+        from syrinx.cache import ParseCache
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            fpath = join(tmp_dir, 'parse.sqlite')
+            cache = ParseCache(fpath, 'v1')
+            key = cache.key(b'+++\nTitle = "a"\n+++\nfoo')
+            self.assertIsNone(cache.get(key))
+            cache.put(key, {'Title': 'a'}, 'foo', '<p>foo</p>')
+            cache.close()
+            cache = ParseCache(fpath, 'v1')
+            self.assertEqual(cache.get(key), ({'Title': 'a'}, 'foo', '<p>foo</p>'))
+            cache.close()
+
+    def test_closed_on_error(self):
+        """Used as a context manager, the cache is written and closed
+        also if reading fails
+        """
+        from syrinx.cache import ParseCache
+        import sqlite3
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            fpath = join(tmp_dir, 'parse.sqlite')
+            with self.assertRaises(ValueError):
+                with ParseCache(fpath, 'v1') as cache:
+                    key = cache.key(b'foo')
+                    cache.put(key, {}, 'foo', '<p>foo</p>')
+                    raise ValueError('Invalid frontmatter')
+            with self.assertRaises(sqlite3.ProgrammingError):
+                cache.get(key)
+            with ParseCache(fpath, 'v1') as cache:
+                self.assertEqual(cache.get(key), ({}, 'foo', '<p>foo</p>'))
+
+    def test_salt(self):
+        """Same content gives a different key with a different salt
+        """
+        from syrinx.cache import ParseCache
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache1 = ParseCache(join(tmp_dir, 'a.sqlite'), 'v1')
+            cache2 = ParseCache(join(tmp_dir, 'b.sqlite'), 'v2')
+            self.assertNotEqual(cache1.key(b'foo'), cache2.key(b'foo'))
+            self.assertEqual(cache1.key(b'foo'), cache1.key(b'foo'))
+            cache1.close()
+            cache2.close()
+
+    def test_evict_least_recently_used(self):
+        """Beyond the maximum size, the entries used longest ago are removed
+        """
+        from syrinx.cache import ParseCache
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache = ParseCache(join(tmp_dir, 'parse.sqlite'), 'v1', max_bytes=10**9)
+            for k in ('a', 'b', 'c'):
+                cache.put(k, {}, '', 'x' * 100)
+            cache.close()
+            cache = ParseCache(join(tmp_dir, 'parse.sqlite'), 'v1', max_bytes=300)
+            cache.get('a')
+            cache.close()
+            cache = ParseCache(join(tmp_dir, 'parse.sqlite'), 'v1')
+            self.assertIsNotNone(cache.get('a'))
+            self.assertIsNone(cache.get('b'))
+            self.assertIsNotNone(cache.get('c'))
+            cache.close()
+
+
+class BytecodeCacheTests(TestCase):
+
+    def test_compiled_once(self):
+        """Templates are compiled only once across builds, until changed
+        """
+        from unittest.mock import patch
+        from jinja2 import Environment, FileSystemLoader
+        from syrinx.cache import open_bytecode_cache
+        compiled = []
+        with tempfile.TemporaryDirectory() as root_dir:
+            for content in ['a', 'a', 'b']:
+                with open(join(root_dir, 'page.jinja2'), 'w') as fhandle:
+                    fhandle.write(content)
+                env = Environment(loader=FileSystemLoader(root_dir),
+                                  bytecode_cache=open_bytecode_cache(root_dir))
+                with patch.object(env, 'compile', wraps=env.compile) as compile:
+                    self.assertEqual(env.get_template('page.jinja2').render(), content)
+                compiled.append(compile.call_count)
+        self.assertEqual(compiled, [1, 0, 1])
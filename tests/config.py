@@ -29,11 +29,18 @@ class ConfigTests(TestCase):
         ## if argument not supplied, the attribute is not set
         args = Namespace()
         config = configure(args)
+        self.assertFalse(config.cache)
         self.assertTrue(config.clean)
+        self.assertFalse(config.data_in_memory)
+        self.assertFalse(config.data_write_files)
         self.assertIsNone(config.domain)
         self.assertEqual(config.environment, 'default')
+        self.assertFalse(config.incremental)
+        self.assertEqual(config.jobs, 1)
         self.assertFalse(config.leaf_pages)
+        self.assertFalse(config.link_assets)
         self.assertEqual(config.sitemap, 'opt-out')
+        self.assertFalse(config.sitemap_gzip)
         self.assertEqual(config.urlformat, 'filesystem')
         self.assertFalse(config.verbose)
 
@@ -53,7 +60,9 @@ class ConfigTests(TestCase):
             clean = false
             domain = "some.where.bla"
             environment = "staging"
+            jobs = 4
             leaf_pages = true
+            link_assets = true
             urlformat = "clean"
             verbose = true
         """
@@ -62,7 +71,9 @@ class ConfigTests(TestCase):
         self.assertFalse(config.clean)
         self.assertEqual(config.domain, 'some.where.bla')
         self.assertEqual(config.environment, 'staging')
+        self.assertEqual(config.jobs, 4)
         self.assertTrue(config.leaf_pages)
+        self.assertTrue(config.link_assets)
         self.assertEqual(config.urlformat, 'clean')
         self.assertTrue(config.verbose)
 
@@ -107,19 +118,33 @@ class ConfigTests(TestCase):
         """
         from syrinx.config import SyrinxConfiguration
         config = SyrinxConfiguration()
+        config.cache = False
         config.clean = True
+        config.data_in_memory = False
+        config.data_write_files = False
         config.domain = 'some.where.bla'
         config.environment = 'default'
+        config.incremental = False
+        config.jobs = 1
         config.leaf_pages = False
+        config.link_assets = False
         config.sitemap = 'opt-out'
+        config.sitemap_gzip = False
         config.urlformat = 'filesystem'
         config.verbose = False
         self.assertEqual(str(config), 
+            '\tcache = false\n'
             '\tclean = true\n'
+            '\tdata_in_memory = false\n'
+            '\tdata_write_files = false\n'
             '\tdomain = "some.where.bla"\n'
             '\tenvironment = "default"\n'
+            '\tincremental = false\n'
+            '\tjobs = 1\n'
             '\tleaf_pages = false\n'
+            '\tlink_assets = false\n'
             '\tsitemap = "opt-out"\n'
+            '\tsitemap_gzip = false\n'
             '\turlformat = "filesystem"\n'
             '\tverbose = false'
         )
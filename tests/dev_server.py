@@ -0,0 +1,64 @@
+from __future__ import annotations
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+
+class DevServerTests(TestCase):
+
+    def test_wait_for_reload_merges_changes(self):
+        """Changes of the reloads a client missed are combined, and any
+        full build means that all pages may have changed
+        """
+        from syrinx.server.dev_server import DevServer
+        server = DevServer(Mock(dir='/site', port=8000))
+        server.trigger_reload(['blog/a.html'], [])
+        server.trigger_reload(['index.html'], ['assets/style.css'])
+        self.assertEqual(server.wait_for_reload(0, 0), dict(
+            version=2,
+            pages=['blog/a.html', 'index.html'],
+            assets=['assets/style.css'],
+        ))
+        self.assertEqual(server.wait_for_reload(1, 0)['pages'], ['index.html'])
+        server.trigger_reload(None, [])
+        self.assertIsNone(server.wait_for_reload(1, 0)['pages'])
+
+    def test_wait_for_reload_timeout(self):
+        """None is returned if there was no reload in time
+        """
+        from syrinx.server.dev_server import DevServer
+        server = DevServer(Mock(dir='/site', port=8000))
+        server.trigger_reload(['index.html'])
+        self.assertIsNone(server.wait_for_reload(1, 0.01))
+
+    def test_wait_for_reload_after_restart(self):
+        """Clients with a version from before a restart reload at once
+        """
+        from syrinx.server.dev_server import DevServer
+        server = DevServer(Mock(dir='/site', port=8000))
+        server.trigger_reload(['index.html'])
+        self.assertEqual(server.wait_for_reload(7, 10),
+                         dict(version=1, pages=None, assets=[]))
+
+    @patch('syrinx.server.build_session.build')
+    def test_asset_change_event(self, build):
+        """An asset change is sent to clients with its URL path and no
+        pages, so that they can swap it without reloading
+        """
+        from syrinx.server.dev_server import DevServer
+        from syrinx.server.build_session import BuildSession
+        from os.path import join
+        from os import makedirs
+        import tempfile
+        with tempfile.TemporaryDirectory() as root_dir:
+            makedirs(join(root_dir, 'theme', 'assets', 'css'))
+            fpath = join(root_dir, 'theme', 'assets', 'css', 'style.css')
+            with open(fpath, 'w') as fhandle:
+                fhandle.write('body {}')
+            session = BuildSession(Mock(dir=root_dir))
+            session.root = Mock()
+            session.config = Mock(link_assets=False)
+            server = DevServer(Mock(dir=root_dir, port=8000))
+            server.trigger_reload(*session.update([fpath]))
+        self.assertEqual(server.wait_for_reload(0, 0), dict(
+            version=1, pages=[], assets=['assets/css/style.css']))
+        self.assertFalse(build.called)
@@ -0,0 +1,111 @@
+from __future__ import annotations
+from unittest import TestCase
+from unittest.mock import Mock, patch
+from os.path import join
+import tempfile
+
+
+class HotReloadHandlerTests(TestCase):
+
+    def makeHandler(self, dist_dir: str, path: str):
+        from syrinx.server.hot_reload_handler import HotReloadHandler
+        dev_server = Mock()
+        dev_server.reload_version = 1
+        HotReloadHandler.initialize(dev_server, dist_dir)
+        handler = HotReloadHandler.__new__(HotReloadHandler)
+        handler.directory = dist_dir
+        handler.path = path
+        return handler
+
+    def test_page_cached_until_rebuild(self):
+        """Pages are read and injected once per reload version
+        """
+        with tempfile.TemporaryDirectory() as dist_dir:
+            fpath = join(dist_dir, 'index.html')
+            with open(fpath, 'w') as fhandle:
+                fhandle.write('<body>ä</body>')
+            handler = self.makeHandler(dist_dir, '/?x=1')
+            self.assertEqual(handler.page_path(), fpath)
+            etag, body = handler.injected_page(fpath)
+            self.assertIn('<script>', body.decode())
+            self.assertTrue(body.decode().startswith('<body>ä'))
+            with patch('syrinx.server.hot_reload_handler.open') as mock_open:
+                self.assertEqual(handler.injected_page(fpath), (etag, body))
+                self.assertFalse(mock_open.called)
+            handler.dev_server.reload_version = 2
+            new_etag, _ = handler.injected_page(fpath)
+        self.assertNotEqual(new_etag, etag)
+
+    def test_page_path(self):
+        """Only HTML pages and directory indexes get the reload script
+        """
+        handler = self.makeHandler('/dist', '/blog/')
+        self.assertEqual(handler.page_path(), '/dist/blog/index.html')
+        handler.path = '/blog/post.html'
+        self.assertEqual(handler.page_path(), '/dist/blog/post.html')
+        handler.path = '/assets/style.css'
+        self.assertIsNone(handler.page_path())
+
+    def test_keep_alive(self):
+        """Requests are served concurrently, and several requests can be
+        made over one connection
+        """
+        from http.server import ThreadingHTTPServer
+        from http.client import HTTPConnection
+        from syrinx.server.hot_reload_handler import HotReloadHandler
+        import threading
+        with tempfile.TemporaryDirectory() as dist_dir:
+            with open(join(dist_dir, 'index.html'), 'w') as fhandle:
+                fhandle.write('<body></body>')
+            self.makeHandler(dist_dir, '/')
+            with ThreadingHTTPServer(('127.0.0.1', 0), HotReloadHandler) as httpd:
+                thread = threading.Thread(target=httpd.serve_forever)
+                thread.start()
+                try:
+                    idle = HTTPConnection('127.0.0.1', httpd.server_address[1])
+                    idle.connect()
+                    connection = HTTPConnection('127.0.0.1', httpd.server_address[1], timeout=5)
+                    statuses, sockets = [], []
+                    for path in ['/', '/__dev_reload_check__', '/']:
+                        connection.request('GET', path)
+                        response = connection.getresponse()
+                        response.read()
+                        statuses.append(response.status)
+                        sockets.append(connection.sock)
+                    self.assertEqual(statuses, [200, 200, 200])
+                    self.assertIsNotNone(sockets[0])
+                    self.assertTrue(all(sock is sockets[0] for sock in sockets))
+                    connection.close()
+                    idle.close()
+                finally:
+                    httpd.shutdown()
+                    thread.join()
+
+    def test_event_stream(self):
+        """Reloads are pushed to connected clients as server-sent events
+        """
+        from http.server import ThreadingHTTPServer
+        from http.client import HTTPConnection
+        from syrinx.server.dev_server import DevServer
+        from syrinx.server.hot_reload_handler import HotReloadHandler
+        import threading, json
+        with tempfile.TemporaryDirectory() as dist_dir:
+            dev_server = DevServer(Mock(dir=dist_dir, port=0))
+            HotReloadHandler.initialize(dev_server, dist_dir)
+            with ThreadingHTTPServer(('127.0.0.1', 0), HotReloadHandler) as httpd:
+                thread = threading.Thread(target=httpd.serve_forever)
+                thread.start()
+                try:
+                    connection = HTTPConnection('127.0.0.1', httpd.server_address[1], timeout=5)
+                    connection.request('GET', '/__dev_events__?version=0')
+                    response = connection.getresponse()
+                    self.assertEqual(response.getheader('Content-Type'), 'text/event-stream')
+                    dev_server.trigger_reload(['blog/a.html'], [])
+                    self.assertEqual(response.readline(), b'id: 1\n')
+                    data = response.readline().decode()
+                    self.assertEqual(json.loads(data[len('data: '):]), dict(
+                        version=1, pages=['blog/a.html'], assets=[]))
+                    connection.close()
+                finally:
+                    httpd.shutdown()
+                    thread.join()
@@ -0,0 +1,247 @@
+from __future__ import annotations
+from unittest import TestCase
+from unittest.mock import Mock
+from os.path import join, isfile
+import tempfile
+
+
+class ManifestTests(TestCase):
+
+    def makeNode(self, source_path: str, md: str = '', front=None):
+        node = Mock()
+        node.source_path = source_path
+        parts = source_path.split('/')
+        node.name = parts[-2] if parts[-1] == 'index.md' else parts[-1].split('.')[0]
+        node.front = front or dict()
+        node.content_md = md
+        node.branches = []
+        node.leaves = []
+        node.lastModified = None
+        return node
+
+    def touch(self, fpath: str):
+        with open(fpath, 'w') as fhandle:
+            fhandle.write('')
+
+    def test_outdated_without_previous_build(self):
+        """Every page has to be built if there is no manifest yet
+        """
+        from syrinx.manifest import load_manifest
+        with tempfile.TemporaryDirectory() as root_dir:
+            manifest = load_manifest(root_dir)
+            self.assertTrue(manifest.is_empty())
+            root = self.makeNode('/index.md')
+            manifest.begin(root, 'abc', root_dir)
+            self.assertTrue(manifest.is_outdated(root, join(root_dir, 'index.html')))
+
+    def test_unchanged_page_skipped(self):
+        """A page is up to date if its content, dependencies and output
+        are the same as in the previous build
+        """
+        from syrinx.manifest import load_manifest
+        with tempfile.TemporaryDirectory() as root_dir:
+            out_fpath = join(root_dir, 'index.html')
+            self.touch(out_fpath)
+            root = self.makeNode('/index.md', 'a')
+            manifest = load_manifest(root_dir)
+            manifest.begin(root, 'abc', root_dir)
+            manifest.is_outdated(root, out_fpath)
+            manifest.save()
+
+            manifest = load_manifest(root_dir)
+            manifest.begin(root, 'abc', root_dir)
+            self.assertFalse(manifest.is_outdated(root, out_fpath))
+
+    def test_changed_node_outdates_pages_reading_it(self):
+        """Pages that read a node while rendering are built again when it
+        changes, also if it is further down the tree, while pages that
+        didn't read it remain up to date
+        """
+        from syrinx.manifest import load_manifest
+        with tempfile.TemporaryDirectory() as root_dir:
+            root = self.makeNode('/index.md')
+            foo = self.makeNode('/foo/index.md')
+            bar = self.makeNode('/bar/index.md')
+            baz = self.makeNode('/foo/baz.md', 'one')
+            root.branches = [foo, bar]
+            foo.leaves = [baz]
+            pages = [(root, 'index.html', [root, foo, baz]), (foo, 'foo.html', [foo, baz]),
+                     (bar, 'bar.html', [bar, root])]
+            for _, fname, _ in pages:
+                self.touch(join(root_dir, fname))
+
+            def build():
+                manifest = load_manifest(root_dir)
+                manifest.begin(root, 'abc', root_dir)
+                outdated = []
+                for node, fname, reads in pages:
+                    outdated.append(manifest.is_outdated(node, join(root_dir, fname)))
+                    manifest.record_reads(node, [manifest.keys[id(n)] for n in reads])
+                manifest.save()
+                return outdated
+
+            build()
+            baz.content_md = 'two'
+            self.assertEqual(build(), [True, True, False])
+            self.assertEqual(build(), [False, False, False])
+            foo.leaves = [baz, self.makeNode('/foo/qux.md')]
+            self.assertEqual(build(), [True, True, False])
+
+    def test_settings_change_outdates_all(self):
+        """If the configuration changes, all pages are outdated
+        """
+        from syrinx.manifest import load_manifest
+        with tempfile.TemporaryDirectory() as root_dir:
+            out_fpath = join(root_dir, 'index.html')
+            self.touch(out_fpath)
+            root = self.makeNode('/index.md')
+            manifest = load_manifest(root_dir)
+            manifest.begin(root, 'abc', root_dir)
+            manifest.is_outdated(root, out_fpath)
+            manifest.save()
+
+            manifest = load_manifest(root_dir)
+            manifest.begin(root, 'xyz', root_dir)
+            self.assertTrue(manifest.is_outdated(root, out_fpath))
+
+    def test_remove_stale(self):
+        """Output of pages that were removed is deleted
+        """
+        from syrinx.manifest import load_manifest
+        with tempfile.TemporaryDirectory() as root_dir:
+            root = self.makeNode('/index.md')
+            foo = self.makeNode('/foo.md')
+            root.leaves = [foo]
+            manifest = load_manifest(root_dir)
+            manifest.begin(root, 'abc', root_dir)
+            for node, fname in [(root, 'index.html'), (foo, 'foo.html')]:
+                self.touch(join(root_dir, fname))
+                manifest.is_outdated(node, join(root_dir, fname))
+            manifest.save()
+
+            root.leaves = []
+            manifest = load_manifest(root_dir)
+            manifest.begin(root, 'abc', root_dir)
+            manifest.is_outdated(root, join(root_dir, 'index.html'))
+            self.assertEqual(manifest.remove_stale(), 1)
+            self.assertFalse(isfile(join(root_dir, 'foo.html')))
+            self.assertTrue(isfile(join(root_dir, 'index.html')))
+
+    def test_template_change_outdates_its_pages(self):
+        """Pages are outdated when a template they load changes, including
+        those extended or included, but not when other templates change
+        """
+        from syrinx.manifest import load_manifest, TemplateDependencies
+        from jinja2 import Environment, DictLoader
+        templates = {
+            'master.jinja2': '{% block main %}{% endblock %}',
+            'page.jinja2': '{% extends "master.jinja2" %}',
+            'leaf.jinja2': '{% extends "master.jinja2" %}{% include "card.jinja2" %}',
+            'card.jinja2': 'card',
+        }
+        with tempfile.TemporaryDirectory() as root_dir:
+            root = self.makeNode('/index.md')
+            foo = self.makeNode('/foo.md')
+            root.leaves = [foo]
+            pages = [(root, 'index.html', 'page.jinja2'), (foo, 'foo.html', 'leaf.jinja2')]
+
+            def outdated():
+                manifest = load_manifest(root_dir)
+                env = Environment(loader=DictLoader(templates))
+                manifest.begin(root, 'abc', root_dir, TemplateDependencies(env))
+                result = [manifest.is_outdated(n, join(root_dir, f), t) for n, f, t in pages]
+                manifest.save()
+                return result
+
+            for _, fname, _ in pages:
+                self.touch(join(root_dir, fname))
+            self.assertEqual(outdated(), [True, True])
+            self.assertEqual(outdated(), [False, False])
+            templates['card.jinja2'] = 'new card'
+            self.assertEqual(outdated(), [False, True])
+            templates['master.jinja2'] = 'new master'
+            self.assertEqual(outdated(), [True, True])
+
+    def test_branch_date_change_outdates_pages(self):
+        """Pages showing the date of a branch, or listing a child that
+        does, are built again when the branches file changes
+        """
+        from argparse import Namespace
+        from syrinx.run import run_pipeline
+        from os import makedirs
+        with tempfile.TemporaryDirectory() as root_dir:
+            makedirs(join(root_dir, 'content', 'foo'))
+            makedirs(join(root_dir, 'theme', 'templates'))
+            with open(join(root_dir, 'content', 'index.md'), 'w') as fhandle:
+                fhandle.write('# Home')
+            with open(join(root_dir, 'content', 'foo', 'index.md'), 'w') as fhandle:
+                fhandle.write('+++\nLastModifiedBranch = "main"\n+++\n# Foo')
+            with open(join(root_dir, 'theme', 'templates', 'page.jinja2'), 'w') as fhandle:
+                fhandle.write('{% for b in index.branches %}{{ b.lastModified }}{% endfor %}'
+                              '|{{ index.lastModified }}')
+
+            def build_with(date: str):
+                with open(join(root_dir, 'branches.toml'), 'w') as fhandle:
+                    fhandle.write(f'main = {date}\n')
+                run_pipeline(Namespace(dir=root_dir, incremental=True))
+                with open(join(root_dir, 'dist', 'index.html')) as fhandle:
+                    index_html = fhandle.read()
+                with open(join(root_dir, 'dist', 'foo', 'index.html')) as fhandle:
+                    return index_html, fhandle.read()
+
+            build_with('2024-01-01T00:00:00')
+            self.assertEqual(build_with('2024-02-01T00:00:00'), (
+                '2024-02-01 00:00:00|None',
+                '|2024-02-01 00:00:00'
+            ))
+
+    def test_full_build_removes_manifest(self):
+        """A full build leaves no manifest behind, so that a later
+        incremental build doesn't compare against an older one
+        """
+        from argparse import Namespace
+        from syrinx.run import run_pipeline
+        from os import makedirs
+        with tempfile.TemporaryDirectory() as root_dir:
+            makedirs(join(root_dir, 'content'))
+            makedirs(join(root_dir, 'theme', 'templates'))
+            with open(join(root_dir, 'theme', 'templates', 'page.jinja2'), 'w') as fhandle:
+                fhandle.write('{{ index.content_md }}')
+
+            def build_with(content: str, incremental: bool):
+                with open(join(root_dir, 'content', 'index.md'), 'w') as fhandle:
+                    fhandle.write(f'+++\n+++\n{content}')
+                run_pipeline(Namespace(dir=root_dir, incremental=incremental))
+                with open(join(root_dir, 'dist', 'index.html')) as fhandle:
+                    return fhandle.read()
+
+            build_with('one', incremental=True)
+            build_with('two', incremental=False)
+            self.assertFalse(isfile(join(root_dir, '.syrinx-cache', 'manifest.json')))
+            self.assertEqual(build_with('one', incremental=True), 'one')
+
+    def test_page_reading_grandchildren(self):
+        """Pages are built again when a node their template read changed,
+        such as a home page listing the leaves of its branches
+        """
+        from argparse import Namespace
+        from syrinx.run import run_pipeline
+        from os import makedirs
+        with tempfile.TemporaryDirectory() as root_dir:
+            makedirs(join(root_dir, 'content', 'news'))
+            makedirs(join(root_dir, 'theme', 'templates'))
+            with open(join(root_dir, 'theme', 'templates', 'root.jinja2'), 'w') as fhandle:
+                fhandle.write('{% for b in index.branches %}{% for l in b.leaves %}'
+                              '{{ l.title }}{% endfor %}{% endfor %}')
+            with open(join(root_dir, 'theme', 'templates', 'page.jinja2'), 'w') as fhandle:
+                fhandle.write('{{ index.title }}')
+            for fname, content in [('index.md', ''), ('news/index.md', ''),
+                                   ('news/a.md', 'Title = "Old"')]:
+                with open(join(root_dir, 'content', fname), 'w') as fhandle:
+                    fhandle.write(f'+++\n{content}\n+++\n')
+            run_pipeline(Namespace(dir=root_dir, incremental=True))
+            with open(join(root_dir, 'content', 'news', 'a.md'), 'w') as fhandle:
+                fhandle.write('+++\nTitle = "New"\n+++\n')
+            run_pipeline(Namespace(dir=root_dir, incremental=True))
+            with open(join(root_dir, 'dist', 'index.html')) as fhandle:
+                self.assertEqual(fhandle.read(), 'New')
@@ -1,5 +1,5 @@
 from unittest import TestCase
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 from parameterized import parameterized
 
 class ContentNodeTests(TestCase):
@@ -14,6 +14,40 @@ class ContentNodeTests(TestCase):
         node.front['Title'] = 'Hello World'
         self.assertEqual(node.title, 'Hello World')
 
+    @patch('syrinx.node.markdown')
+    def test_content_html_lazy(self, markdown):
+        """Markdown is converted once, when the html is first used
+        """
+        from syrinx.node import ContentNode
+        markdown.return_value = '<p>foo</p>'
+        node = ContentNode(Mock())
+        node.setContent('/foo.md', dict(), 'foo')
+        self.assertFalse(markdown.called)
+        self.assertEqual(node.content_html, '<p>foo</p>')
+        self.assertEqual(node.content_html, '<p>foo</p>')
+        self.assertEqual(markdown.call_count, 1)
+        node.setContent('/foo.md', dict(), 'foo', '<p>bar</p>')
+        self.assertEqual(node.content_html, '<p>bar</p>')
+        self.assertEqual(markdown.call_count, 1)
+
+    def test_address_memoized(self):
+        """Derived properties are computed once, until the content changes
+        """
+        from syrinx.node import makeBranchNode, makeLeafNode
+        config = Mock()
+        config.domain = 'foo.bar'
+        config.urlformat = 'clean'
+        node = makeBranchNode(config, 'lorem')
+        node.setContent('/lorem/index.md', dict(), '')
+        self.assertEqual(node.address, 'https://foo.bar/lorem')
+        node.leaves.append(makeLeafNode(config))
+        self.assertEqual(node.address, 'https://foo.bar/lorem')
+        node.invalidate()
+        self.assertEqual(node.address, 'https://foo.bar/lorem/')
+        config.domain = 'other.bar'
+        node.setContent('/lorem/index.md', dict(), '')
+        self.assertEqual(node.address, 'https://other.bar/lorem/')
+
     @parameterized.expand([
         ['opt-out', False, True, 'a', False],
         ['opt-in', None, True, 'a', False],
@@ -45,3 +79,23 @@ class ContentNodeTests(TestCase):
         msg = (f'sitemap mode: {cfg}, frontmatter: {fm}, buildPage: {bld},'
             f' address: {url}, expected: {exp}')
         self.assertEqual(node.includeInSitemap, exp, msg)
+
+    def test_children(self):
+        """Branch nodes each get their own lists of children, leaves
+        share an empty tuple, so can't be given children
+        """
+        from syrinx.node import ContentNode, makeBranchNode, makeLeafNode, NO_CHILDREN
+        config = Mock()
+        foo, bar = makeBranchNode(config, 'foo'), makeBranchNode(config, 'bar')
+        leaf = makeLeafNode(config)
+        foo.leaves.append(leaf)
+        foo.branches.append(bar)
+        self.assertEqual(foo.leaves, [leaf])
+        self.assertEqual(foo.branches, [bar])
+        self.assertEqual((bar.leaves, bar.branches), ([], []))
+        self.assertEqual(ContentNode(config).leaves, [])
+        self.assertIs(leaf.leaves, NO_CHILDREN)
+        self.assertIs(leaf.branches, NO_CHILDREN)
+        with self.assertRaises(AttributeError):
+            leaf.leaves.append(bar)
+        self.assertIs(makeLeafNode(config).leaves, NO_CHILDREN)
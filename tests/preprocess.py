@@ -0,0 +1,199 @@
+from __future__ import annotations
+from unittest import TestCase
+from unittest.mock import Mock, patch
+from os.path import join, getmtime, isfile
+from os import makedirs, utime
+import tempfile
+
+
+class PreprocessTests(TestCase):
+
+    def makeProject(self, root_dir: str, rows: str):
+        makedirs(join(root_dir, 'archetypes'))
+        makedirs(join(root_dir, 'data'))
+        with open(join(root_dir, 'archetypes', 'people.md'), 'w') as fhandle:
+            fhandle.write('+++\nTitle = "{{ Name }}"\n+++\n')
+        with open(join(root_dir, 'data', 'people.tsv'), 'w') as fhandle:
+            fhandle.write('Id\tName\n' + rows)
+
+    def test_unchanged_records_not_written(self):
+        """Only files of records that changed are written again,
+        files of removed records are deleted
+        """
+        from syrinx.preprocess import preprocess
+        config = Mock()
+        config.clean = True
+        config.data_in_memory = False
+        with tempfile.TemporaryDirectory() as root_dir:
+            self.makeProject(root_dir, 'a\tAnn\nb\tBob\nc\tCy\n')
+            preprocess(root_dir, config)
+            people_dir = join(root_dir, 'content', 'people')
+            for name in 'abc':
+                utime(join(people_dir, f'{name}.md'), (0, 0))
+
+            with open(join(root_dir, 'data', 'people.tsv'), 'w') as fhandle:
+                fhandle.write('Id\tName\na\tAnn\nb\tBobby\n')
+            preprocess(root_dir, config)
+            self.assertEqual(getmtime(join(people_dir, 'a.md')), 0)
+            self.assertNotEqual(getmtime(join(people_dir, 'b.md')), 0)
+            self.assertFalse(isfile(join(people_dir, 'c.md')))
+
+    def test_output_unchanged(self):
+        """Content files are the same as those written by converting
+        rows one at a time, for columns of mixed types and missing values,
+        also when the rows are read in chunks
+        """
+        from syrinx.preprocess import preprocess
+        config = Mock()
+        config.clean = True
+        config.data_in_memory = False
+        config.cache = False
+        with tempfile.TemporaryDirectory() as root_dir:
+            makedirs(join(root_dir, 'archetypes'))
+            makedirs(join(root_dir, 'data'))
+            with open(join(root_dir, 'archetypes', 'items.md'), 'w') as fhandle:
+                fhandle.write('+++\nTitle = "{{ name }}"\ncount = "{{ count }}"\n'
+                              'flag = "{{ flag }}"\nprice = "{{ price }}"\n'
+                              'seq = "{{ SequenceNumber }}"\n+++\n{{ Id }} {{ Archetype }}\n')
+            with open(join(root_dir, 'data', 'items.tsv'), 'w') as fhandle:
+                fhandle.write('Id\tcount\tname\tflag\tprice\n'
+                              'a\t1\tAnn\tTrue\t1.5\n'
+                              'b\t2\tBob\tFalse\t2\n'
+                              'c\t\t\t\t\n'
+                              'd\t4\tDee\tTrue\t3.25\n')
+            with patch('syrinx.preprocess.CHUNK_SIZE', 2):
+                preprocess(root_dir, config)
+            outputs = dict()
+            for label in 'abcd':
+                with open(join(root_dir, 'content', 'items', f'{label}.md')) as fhandle:
+                    outputs[label] = fhandle.read()
+        template = '+++\nTitle = "{}"\ncount = "{}"\nflag = "{}"\nprice = "{}"\nseq = "{}"\n+++\n{} items'
+        self.assertEqual(outputs, dict(
+            a=template.format('Ann', '1.0', 'True', '1.5', 0, 'a'),
+            b=template.format('Bob', '2.0', 'False', '2.0', 1, 'b'),
+            c=template.format('None', 'None', 'None', 'None', 2, 'c'),
+            d=template.format('Dee', '4.0', 'True', '3.25', 3, 'd'),
+        ))
+
+    def test_read_tsv_chunks(self):
+        """Rows are read in chunks, with sequence numbers continuing
+        across chunks
+        """
+        from syrinx.preprocess import read_tsv
+        with tempfile.TemporaryDirectory() as root_dir:
+            self.makeProject(root_dir, 'a\tAnn\nb\tBob\nc\t\n')
+            chunks = list(read_tsv(join(root_dir, 'data', 'people.tsv'), 'people', chunksize=2))
+        self.assertEqual([labels for _, labels, _ in chunks], [['a', 'b'], ['c']])
+        self.assertEqual(chunks[0][0], 'Id')
+        self.assertEqual(chunks[1][2], [
+            dict(Name=None, SequenceNumber=2, Archetype='people')
+        ])
+
+    def test_read_tsv_types_across_chunks(self):
+        """Column types are the same in every chunk, also if missing
+        values only occur in a later chunk
+        """
+        from syrinx.preprocess import read_tsv
+        with tempfile.TemporaryDirectory() as root_dir:
+            fpath = join(root_dir, 'items.tsv')
+            with open(fpath, 'w') as fhandle:
+                fhandle.write('Id\tcount\tname\na\t1\tAnn\nb\t2\tBob\nc\t\t\nd\t4\tDee\n')
+            chunked = [r for (_, _, records) in read_tsv(fpath, 'items', chunksize=2)
+                       for r in records]
+            whole = list(read_tsv(fpath, 'items'))[0][2]
+        self.assertEqual(chunked, whole)
+        self.assertEqual([(r['count'], type(r['count'])) for r in chunked], [
+            (1.0, float), (2.0, float), (None, type(None)), (4.0, float)
+        ])
+        self.assertEqual([r['name'] for r in chunked], ['Ann', 'Bob', None, 'Dee'])
+
+    def test_read_tsv_bools_across_chunks(self):
+        """Boolean columns stay booleans if missing values only occur
+        in a later chunk, as when the whole file is read at once
+        """
+        from syrinx.preprocess import read_tsv
+        with tempfile.TemporaryDirectory() as root_dir:
+            fpath = join(root_dir, 'items.tsv')
+            with open(fpath, 'w') as fhandle:
+                fhandle.write('Id\tdone\na\tTrue\nb\tFalse\nc\t\nd\tTrue\n')
+            chunked = [r for (_, _, records) in read_tsv(fpath, 'items', chunksize=2)
+                       for r in records]
+            whole = list(read_tsv(fpath, 'items'))[0][2]
+        self.assertEqual(chunked, whole)
+        self.assertEqual([(r['done'], type(r['done'])) for r in chunked], [
+            (True, bool), (False, bool), (None, type(None)), (True, bool)
+        ])
+
+    def test_archetype_columns(self):
+        """Only columns used in the archetype are loaded, unless it
+        includes other templates
+        """
+        from syrinx.preprocess import archetype_columns
+        from jinja2 import Environment, DictLoader
+        env = Environment(loader=DictLoader({
+            'a.md': 'Title = "{{ Name }}" {{ SequenceNumber }}',
+            'b.md': '{% include "a.md" %}',
+        }))
+        self.assertEqual(archetype_columns(env, 'a.md'), {'Name', 'SequenceNumber'})
+        self.assertIsNone(archetype_columns(env, 'b.md'))
+
+    def test_read_sqlite(self):
+        """Rows of a SQLite table are read, with the projected columns
+        """
+        from syrinx.preprocess import read_sqlite
+        import sqlite3
+        with tempfile.TemporaryDirectory() as root_dir:
+            connection = sqlite3.connect(join(root_dir, 'shop.sqlite'))
+            connection.execute('CREATE TABLE products (Id TEXT, Name TEXT, Price REAL)')
+            connection.execute("INSERT INTO products VALUES ('a', 'Apple', 1.5)")
+            connection.commit()
+            connection.close()
+            fpath = join(root_dir, 'products.sqlite.toml')
+            with open(fpath, 'w') as fhandle:
+                fhandle.write('database = "shop.sqlite"\ntable = "products"\n')
+            chunks = list(read_sqlite(fpath, 'products', {'Name'}))
+        self.assertEqual(chunks, [('Id', ['a'], [
+            dict(Name='Apple', SequenceNumber=0, Archetype='products')
+        ])])
+
+    def test_read_parquet_and_feather(self):
+        """Arrow data files are read with the first column as label
+        """
+        try:
+            import pyarrow
+        except ImportError:
+            self.skipTest('pyarrow not installed')
+        from pyarrow import parquet, feather
+        from syrinx.preprocess import read_parquet, read_feather
+        table = pyarrow.table(dict(Id=['a', 'b', 'c'], Name=['Ann', 'Bob', None], Age=[1, 2, 3]))
+        with tempfile.TemporaryDirectory() as root_dir:
+            parquet.write_table(table, join(root_dir, 'people.parquet'))
+            feather.write_feather(table, join(root_dir, 'people.feather'))
+            for reader, fname in [(read_parquet, 'people.parquet'),
+                                  (read_feather, 'people.feather')]:
+                chunks = list(reader(join(root_dir, fname), 'people', {'Name'}, 2))
+                self.assertEqual([labels for _, labels, _ in chunks], [['a', 'b'], ['c']])
+                self.assertEqual(chunks[1][2], [
+                    dict(Name=None, SequenceNumber=2, Archetype='people')
+                ])
+
+    def test_data_in_memory(self):
+        """Records are returned with the data as frontmatter and the
+        archetype rendered without its frontmatter, instead of written
+        """
+        from syrinx.preprocess import preprocess
+        config = Mock()
+        config.clean = True
+        config.data_in_memory = True
+        config.data_write_files = False
+        with tempfile.TemporaryDirectory() as root_dir:
+            self.makeProject(root_dir, 'a\tAnn & Co\n')
+            with open(join(root_dir, 'archetypes', 'people.md'), 'a') as fhandle:
+                fhandle.write('\n# {{ Name }}\n')
+            records = preprocess(root_dir, config)
+            self.assertFalse(isfile(join(root_dir, 'content', 'people', 'a.md')))
+        self.assertEqual(records, dict(people=[(
+            'a',
+            dict(Id='a', Name='Ann & Co', SequenceNumber=0, Archetype='people'),
+            '\n# Ann & Co'
+        )]))
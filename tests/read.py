@@ -15,7 +15,7 @@ class ReadTests(TestCase):
             ('/pth/content', None, ['index.md']),
             ('/pth/content/lorem', None, ['ipsum.md', 'index.md']),
         ]
-        config = Mock()
+        config = Mock(jobs=1)
         from syrinx.read import read
         root = read('/pth', config)
         self.assertTrue(root.branches[0].buildPage)
@@ -30,7 +30,7 @@ class ReadTests(TestCase):
             ('/pth/content', None, ['index.md']),
             ('/pth/content/foo', None, ['bar.md']),
         ]
-        config = Mock()
+        config = Mock(jobs=1)
         from syrinx.read import read
         root = read('/pth', config)
         self.assertFalse(root.branches[0].buildPage)
@@ -45,7 +45,7 @@ class ReadTests(TestCase):
             ('/pth/content', None, ['index.md']),
             ('/pth/content/lorem', None, ['ipsum.md', 'index.md']),
         ]
-        config = Mock()
+        config = Mock(jobs=1)
         config.leaf_pages = False
         from syrinx.read import read
         root = read('/pth', config)
@@ -61,7 +61,7 @@ class ReadTests(TestCase):
             ('/pth/content', None, ['index.md']),
             ('/pth/content/lorem', None, ['ipsum.md', 'index.md']),
         ]
-        config = Mock()
+        config = Mock(jobs=1)
         config.leaf_pages = True
         from syrinx.read import read
         root = read('/pth', config)
@@ -73,7 +73,7 @@ class ReadTests(TestCase):
         raise an exception if it's missing.
         """
         walk.return_value = [('/pth/content', None, ['other.md'])]
-        config = Mock()
+        config = Mock(jobs=1)
         from syrinx.read import read
         from syrinx.exceptions import ContentError
         with self.assertRaisesRegex(ContentError, 'root index file missing'):
@@ -93,7 +93,7 @@ class ReadTests(TestCase):
 
         from syrinx.read import read
         from syrinx.config import BuildMetaInfo
-        config = Mock()
+        config = Mock(jobs=1)
         config.environment = 'foo'
         config.meta = BuildMetaInfo(config, '/pth')
         root = read('/pth', config)
@@ -117,7 +117,7 @@ class ReadTests(TestCase):
             ('/pth/content/foo/bar', None, ['index.md']),
         ]
         from syrinx.read import read
-        config = Mock()
+        config = Mock(jobs=1)
         config.domain = 'loop.xyz'
         config.urlformat = 'filesystem'
         root = read('/pth', config)
@@ -143,7 +143,7 @@ class ReadTests(TestCase):
             ('/pth/content/foo/bar', None, ['index.md']),
         ]
         from syrinx.read import read
-        config = Mock()
+        config = Mock(jobs=1)
         config.domain = 'loop.xyz'
         config.urlformat = 'clean'
         root = read('/pth', config)
@@ -178,7 +178,7 @@ class ReadTests(TestCase):
             ('/pth/content/foo/bar', None, ['index.md']),
         ]
         from syrinx.read import read
-        config = Mock()
+        config = Mock(jobs=1)
         config.domain = 'loop.xyz'
         config.urlformat = 'mkdocs'
         root = read('/pth', config)
@@ -201,7 +201,7 @@ class ReadTests(TestCase):
         walk.return_value = [
             ('/pth/content', None, ['index.md']),
         ]
-        config = Mock()
+        config = Mock(jobs=1)
         from syrinx.read import read
         root = read('/pth', config)
         self.assertEqual(root.name, '')
@@ -216,7 +216,7 @@ class ReadTests(TestCase):
             ('/pth/content', None, ['index.md']),
             ('/pth/content/lorem', None, ['index.md']),
         ]
-        config = Mock()
+        config = Mock(jobs=1)
         from syrinx.read import read
         root = read('/pth', config)
         self.assertEqual(root.branches[0].name, 'lorem')
@@ -231,7 +231,7 @@ class ReadTests(TestCase):
             ('/pth/content', None, ['index.md']),
             ('/pth/content/foo', None, ['bar.md', 'index.md']),
         ]
-        config = Mock()
+        config = Mock(jobs=1)
         from syrinx.read import read
         root = read('/pth', config)
         self.assertEqual(root.branches[0].leaves[0].name, 'bar')
@@ -245,7 +245,7 @@ class ReadTests(TestCase):
         walk.return_value = [
             ('/pth/content', None, ['index.md']),
         ]
-        config = Mock()
+        config = Mock(jobs=1)
         from syrinx.read import read
         root = read('/pth', config)
         self.assertEqual(root.path, '')
@@ -261,7 +261,7 @@ class ReadTests(TestCase):
             ('/pth/content/lorem', None, ['index.md']),
             ('/pth/content/lorem/ipsum', None, ['index.md']),
         ]
-        config = Mock()
+        config = Mock(jobs=1)
         from syrinx.read import read
         root = read('/pth', config)
         self.assertEqual(root.branches[0].path, '/lorem')
@@ -277,7 +277,7 @@ class ReadTests(TestCase):
             ('/pth/content', None, ['index.md']),
             ('/pth/content/foo', None, ['bar.md', 'index.md']),
         ]
-        config = Mock()
+        config = Mock(jobs=1)
         from syrinx.read import read
         root = read('/pth', config)
         self.assertEqual(root.branches[0].leaves[0].path, '/foo')
@@ -291,7 +291,7 @@ class ReadTests(TestCase):
         walk.return_value = [
             ('/pth/content', None, ['index.md']),
         ]
-        config = Mock()
+        config = Mock(jobs=1)
         from syrinx.read import read
         root = read('/pth', config)
         self.assertFalse(root.isLeaf)
@@ -306,7 +306,7 @@ class ReadTests(TestCase):
             ('/pth/content', None, ['index.md']),
             ('/pth/content/lorem', None, ['index.md']),
         ]
-        config = Mock()
+        config = Mock(jobs=1)
         from syrinx.read import read
         root = read('/pth', config)
         self.assertFalse(root.branches[0].isLeaf)
@@ -321,7 +321,7 @@ class ReadTests(TestCase):
             ('/pth/content', None, ['index.md']),
             ('/pth/content/foo', None, ['bar.md', 'index.md']),
         ]
-        config = Mock()
+        config = Mock(jobs=1)
         from syrinx.read import read
         root = read('/pth', config)
         self.assertTrue(root.branches[0].leaves[0].isLeaf)
@@ -336,7 +336,7 @@ class ReadTests(TestCase):
             ('/pth/content', None, ['index.md']),
             ('/pth/content/foo', None, ['bar.md', 'index.md']),
         ]
-        config = Mock()
+        config = Mock(jobs=1)
         from syrinx.read import read
         from sys import maxsize as SYS_MAX_SIZE
         root = read('/pth', config)
@@ -358,9 +358,112 @@ class ReadTests(TestCase):
             ('/pth/content', None, ['index.md']),
             ('/pth/content/foo', None, ['bar.md', 'index.md']),
         ]
-        config = Mock()
+        config = Mock(jobs=1)
         from syrinx.read import read
         root = read('/pth', config)
         self.assertEqual(root.sequenceNumber, 10)
         self.assertEqual(root.branches[0].sequenceNumber, 5)
         self.assertEqual(root.branches[0].leaves[0].sequenceNumber, 3)
+
+    def test_read_parallel_same_order(self):
+        """Files parsed in worker processes end up in the same place
+        in the tree as when parsed one by one
+        """
+        import tempfile, os
+        from syrinx.read import read
+        with tempfile.TemporaryDirectory() as root_dir:
+            os.makedirs(os.path.join(root_dir, 'content', 'foo'))
+            fnames = ['index.md'] + [f'foo/l{i}.md' for i in range(12)]
+            for i, fname in enumerate(fnames):
+                with open(os.path.join(root_dir, 'content', fname), 'w') as fhandle:
+                    fhandle.write(f'+++\nTitle = "T{i}"\n+++\n*{i}*\n')
+            serial = read(root_dir, Mock(jobs=1))
+            parallel = read(root_dir, Mock(jobs=3))
+        def summary(root):
+            return [(n.name, n.title, n.content_html) for n in root.branches[0].leaves]
+        self.assertEqual(summary(parallel), summary(serial))
+        self.assertEqual(parallel.title, 'T0')
+
+    def test_reorder_children(self):
+        """Children are sorted by sequence number then name, and leaves
+        keep their shared empty children
+        """
+        from syrinx.node import makeBranchNode, makeLeafNode, NO_CHILDREN
+        from syrinx.read import reorder_children
+        config = Mock(jobs=1)
+        root = makeBranchNode(config, '')
+        foo = makeBranchNode(config, 'foo')
+        leaves = []
+        for name, seq in [('c', 1), ('b', 2), ('a', 1)]:
+            leaf = makeLeafNode(config)
+            leaf.name = name
+            leaf.front = dict(SequenceNumber=seq)
+            leaves.append(leaf)
+        foo.leaves.extend(leaves)
+        root.branches.append(foo)
+        reorder_children(root)
+        self.assertEqual([leaf.name for leaf in foo.leaves], ['a', 'c', 'b'])
+        reorder_children(leaves[0])
+        for leaf in leaves:
+            self.assertIs(leaf.leaves, NO_CHILDREN)
+            self.assertIs(leaf.branches, NO_CHILDREN)
+
+    def test_read_file_toml_yaml(self):
+        """Frontmatter can be toml or yaml, and the remainder is the content
+        """
+        import tempfile, os
+        from syrinx.read import read_file
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            fpath = os.path.join(tmp_dir, 'a.md')
+            for text in ('+++\nTitle = "a"\n+++\nfoo\n---\nbar\n',
+                         '---\nTitle: a\n---\nfoo\n---\nbar\n'):
+                with open(fpath, 'w') as fhandle:
+                    fhandle.write(text)
+                self.assertEqual(read_file(fpath), ({'Title': 'a'}, 'foo\n---\nbar\n'))
+
+    def test_read_file_without_frontmatter(self):
+        """Files without frontmatter at the start are all content,
+        even if they contain marker lines further down
+        """
+        import tempfile, os
+        from syrinx.read import read_file
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            fpath = os.path.join(tmp_dir, 'a.md')
+            text = '# foo\n---\nbar\n---\n'
+            with open(fpath, 'w') as fhandle:
+                fhandle.write(text)
+            self.assertEqual(read_file(fpath), ({}, text))
+
+    def test_scan_frontmatter_offset(self):
+        """The offset returned points at the start of the main contents
+        """
+        from io import BytesIO
+        from syrinx.read import scan_frontmatter
+        data = '+++\nTitle = "é"\n+++\nfoo'.encode()
+        fm_dict, offset = scan_frontmatter(BytesIO(data))
+        self.assertEqual(fm_dict, {'Title': 'é'})
+        self.assertEqual(data[offset:], b'foo')
+
+    @patch('syrinx.read.walk')
+    @patch('syrinx.read.read_file')
+    def test_read_data_records(self, read_file, walk):
+        """Data records kept in memory become leaves of their collection,
+        content files in the collection other than the index are skipped
+        """
+        read_file.return_value = dict(), ''
+        walk.return_value = [
+            ('/pth/content', None, ['index.md']),
+            ('/pth/content/people', None, ['index.md', 'old.md']),
+        ]
+        config = Mock(jobs=1)
+        records = dict(people=[
+            ('bob', dict(Id='bob', SequenceNumber=1), 'Bob'),
+            ('ann', dict(Id='ann', SequenceNumber=0), 'Ann'),
+        ])
+        from syrinx.read import read
+        root = read('/pth', config, records=records)
+        people = root.branches[0]
+        self.assertEqual([n.name for n in people.leaves], ['ann', 'bob'])
+        self.assertEqual(people.leaves[1].source_path, '/people/bob.md')
+        self.assertEqual(people.leaves[1].content_md, 'Bob')
+        self.assertEqual(read_file.call_count, 2)
@@ -0,0 +1,35 @@
+from __future__ import annotations
+from unittest import TestCase
+from unittest.mock import Mock, patch
+import time
+
+
+class RebuildHandlerTests(TestCase):
+
+    @patch('syrinx.server.rebuild_handler.BuildSession')
+    def test_changes_coalesced(self, BuildSession):
+        """Changes within the quiet window are built together, once,
+        on the trailing edge, and unrelated changes are ignored
+        """
+        from watchdog.events import FileModifiedEvent, FileMovedEvent, FileOpenedEvent
+        from syrinx.server.rebuild_handler import RebuildHandler
+        args = Mock(quiet_window=0.1)
+        BuildSession().apply.return_value = (['blog/a.html'], [])
+        reload = Mock()
+        handler = RebuildHandler('/site', '/site', reload, args)
+        handler.start()
+        handler.on_any_event(FileModifiedEvent('/site/content/a.md'))
+        handler.on_any_event(FileOpenedEvent('/site/content/c.md'))
+        handler.on_any_event(FileModifiedEvent('/site/dist/index.html'))
+        handler.on_any_event(FileMovedEvent('/site/content/b.md~', '/site/content/b.md'))
+        self.assertFalse(BuildSession().apply.called)
+        for _ in range(50):
+            if BuildSession().apply.called:
+                break
+            time.sleep(0.02)
+        handler.stop()
+        BuildSession().apply.assert_called_once()
+        plan = BuildSession().apply.call_args[0][0]
+        self.assertEqual(plan.changed['content'],
+            {'/site/content/a.md', '/site/content/b.md'})
+        reload.assert_called_once_with(['blog/a.html'], [])
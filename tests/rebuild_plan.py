@@ -0,0 +1,50 @@
+from __future__ import annotations
+from unittest import TestCase
+from parameterized import parameterized
+
+
+class RebuildPlanTests(TestCase):
+
+    @parameterized.expand([
+        ['/site/content/blog/post.md', 'content'],
+        ['/site/content/blog/image.png', 'unrelated'],
+        ['/site/data/people.tsv', 'data'],
+        ['/site/archetypes/people.md', 'archetype'],
+        ['/site/theme/templates/leaf.jinja2', 'template'],
+        ['/site/theme/assets/style.css', 'asset'],
+        ['/site/assets/img/logo.png', 'asset'],
+        ['/site/syrinx.cfg', 'config'],
+        ['/site/branches.toml', 'branches'],
+        ['/site/dist/index.html', 'unrelated'],
+        ['/site/content/distant/index.md', 'content'],
+        ['/site/.syrinx-cache/manifest.json', 'unrelated'],
+        ['/site/content/.post.md.swp', 'unrelated'],
+        ['/other/content/index.md', 'unrelated'],
+        ['/site-b/content/index.md', 'unrelated'],
+        ['/site/theme/templates-old/x.html', 'unrelated'],
+        ['/site/theme/assets-old/style.css', 'unrelated'],
+        ['/site/assets-old/logo.png', 'unrelated'],
+        ['/site/assets', 'unrelated'],
+        ['/site/content-old/index.md', 'unrelated'],
+        ['/site/data-old/people.tsv', 'unrelated'],
+        ['/site/archetypes-old/people.md', 'unrelated'],
+    ])
+    def test_classify(self, fpath: str, expected: str):
+        """Changed files are classified by their place in the project
+        """
+        from syrinx.server.rebuild_plan import classify
+        self.assertEqual(classify(fpath, '/site'), expected)
+
+    def test_collections(self):
+        """Data files and archetypes name the collections to preprocess,
+        other data files require all collections
+        """
+        from syrinx.server.rebuild_plan import RebuildPlan
+        plan = RebuildPlan('/site', ['/site/data/people.tsv', '/site/archetypes/pets.md',
+                                     '/site/dist/x.html'])
+        self.assertEqual(plan.collections, {'people', 'pets'})
+        self.assertTrue(plan.needs_render)
+        plan.add('/site/data/shop.sqlite')
+        self.assertIsNone(plan.collections)
+        self.assertFalse(RebuildPlan('/site', ['/site/dist/x.html']))
+        self.assertFalse(RebuildPlan('/site', ['/site/assets/a.css']).needs_render)
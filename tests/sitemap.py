@@ -69,6 +69,44 @@ class SitemapTests(TestCase):
             """.replace('            ', '').strip()
         )
 
+    def test_write_single(self):
+        """If all urls fit in one file, it is called sitemap.xml
+        """
+        import tempfile
+        from os import listdir
+        from os.path import join
+        from syrinx.sitemap import write_sitemap, generate_sitemap
+        urls = [('https://a.b/c', None), ('https://a.b/d', datetime(2025, 9, 22))]
+        with tempfile.TemporaryDirectory() as dist_dir:
+            fnames = write_sitemap(iter(urls), dist_dir, 'https://a.b')
+            self.assertEqual(fnames, ['sitemap.xml'])
+            self.assertEqual(listdir(dist_dir), ['sitemap.xml'])
+            with open(join(dist_dir, 'sitemap.xml')) as fhandle:
+                self.assertEqual(fhandle.read(), generate_sitemap(urls))
+
+    def test_write_split(self):
+        """Beyond the maximum number of urls per file, urls are split 
+        over numbered files and listed in a sitemap index. With compression,
+        the numbered files are gzipped.
+        """
+        import tempfile, gzip
+        from os.path import join
+        from syrinx.sitemap import write_sitemap
+        urls = [(f'https://a.b/{u}', None) for u in range(5)]
+        with tempfile.TemporaryDirectory() as dist_dir:
+            fnames = write_sitemap(iter(urls), dist_dir, 'https://a.b', 
+                                   compress=True, max_urls=2)
+            self.assertEqual(fnames, ['sitemap-1.xml.gz', 'sitemap-2.xml.gz',
+                                      'sitemap-3.xml.gz', 'sitemap_index.xml'])
+            with gzip.open(join(dist_dir, 'sitemap-3.xml.gz'), 'rt') as fhandle:
+                self.assertIn('<loc>https://a.b/4</loc>', fhandle.read())
+            with open(join(dist_dir, 'sitemap_index.xml')) as fhandle:
+                index = fhandle.read()
+            self.assertIn('<loc>https://a.b/sitemap-2.xml.gz</loc>', index)
+            ## splitting again with fewer urls clears the old files
+            fnames = write_sitemap(iter(urls[:1]), dist_dir, 'https://a.b')
+            self.assertEqual(fnames, ['sitemap.xml'])
+
     def makeNode(self, include: bool, url: Optional[str], dt: Optional[datetime]):
         node = Mock()
         node.includeInSitemap = include